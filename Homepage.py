@@ -1,39 +1,57 @@
+import pandas as pd
 import streamlit as st
-import plotly.express as px
-from utils import load_project_data
+from analytics import investment_by_region, national_kpis, projects_by_term
+from instrumentation import start_run, timed
+from utils import (
+    filter_sidebar, has_precomputed, load_rollup, plotly_chart, precomputed, render_diagnostics, rerun_when_warm,
+)
+
+ARTEFACTS = ['national_kpis', 'investment_by_region', 'projects_by_term']
 
 st.set_page_config(page_title="NCPAGkilatis Dashboard", page_icon="🌊", layout="wide")
+start_run("Homepage")
 
 st.title("NCPAGkilatis: DPWH Project Dashboard")
 st.markdown("Welcome! This dashboard provides an overview of DPWH projects. Use the sidebar to explore different analyses.")
 
-df = load_project_data()
+# The entry page does not wait for the data: precomputed KPIs show at once on a cold start,
+# while the background warm-up loads the data behind the filter bar
+filters = filter_sidebar(wait=False)
+ready = has_precomputed(*ARTEFACTS, filters=filters)
+cube = None if ready else load_rollup(filters)
 
-if df is not None:
+if ready or cube is not None:
     st.markdown("---")
     st.header("National Overview")
-    total_projects = df.shape[0]
-    total_cost = df['ContractCost'].sum()
-    avg_delay = df[df['ProjectDelay'] > 0]['ProjectDelay'].mean()
-    total_overdue_projects = df[df['ProjectDelay'] > 0].shape[0]
+    kpis = precomputed('national_kpis', national_kpis, cube, filters=filters).iloc[0]
+    total_projects = int(kpis['TotalProjects'])
+    total_cost = kpis['TotalInvestment']
+    avg_delay = kpis['AverageDelay']
+    total_overdue_projects = int(kpis['DelayedProjects'])
 
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Total Projects Analyzed", f"{total_projects:,}")
     col2.metric("Total Investment", f"₱{(total_cost / 1e9):,.2f}B")
-    col3.metric("Projects with Delays", f"{total_overdue_projects:,} ({total_overdue_projects/total_projects:.1%})")
-    col4.metric("Average Delay Duration", f"{avg_delay:,.0f} days")
+    col3.metric("Projects with Delays", f"{total_overdue_projects:,} ({kpis['DelayedShare']:.1%})")
+    col4.metric("Average Delay Duration", f"{avg_delay:,.0f} days" if pd.notna(avg_delay) else "–")
+
+    # Deferred until the KPIs are on screen, as importing plotly takes a noticeable part of a cold start
+    import plotly.express as px
 
     st.markdown("---")
     st.header("High-Level Insights")
     col1, col2 = st.columns(2)
-    with col1:
+    with col1, timed("Total Investment by Region"):
         st.subheader("Total Investment by Region")
-        region_spending = df.groupby('Region')['ContractCost'].sum().sort_values(ascending=False).reset_index()
+        region_spending = precomputed('investment_by_region', investment_by_region, cube, filters=filters)
         fig = px.bar(region_spending, x='ContractCost', y='Region', orientation='h', title="Total Contract Cost per Region", template='plotly_white')
         fig.update_layout(yaxis={'categoryorder':'total ascending'})
-        st.plotly_chart(fig, use_container_width=True)
-    with col2:
+        plotly_chart(fig, use_container_width=True)
+    with col2, timed("Projects by Presidential Administration"):
         st.subheader("Projects by Presidential Administration")
-        term_counts = df['PresTerm'].value_counts().reset_index()
+        term_counts = precomputed('projects_by_term', projects_by_term, cube, filters=filters)
         fig2 = px.pie(term_counts, names='PresTerm', values='count', title='Number of Projects Initiated per Term', hole=0.4)
-        st.plotly_chart(fig2, use_container_width=True)
+        plotly_chart(fig2, use_container_width=True)
+
+render_diagnostics()
+rerun_when_warm('filter_options')
@@ -0,0 +1,19 @@
+"""Streamlit-free analytics API behind the dashboard pages.
+
+Run ``python -m analytics --help`` to precompute every page's artefacts in batch.
+"""
+from analytics.reports import (
+    average_delay_by_region, contractor_summary, delay_distribution, investment_by_region, national_kpis,
+    projects_by_term, regional_totals, top_agencies, top_anomalies, top_contractors, top_delayed_projects, watchlist_summary,
+    watchlist_treemap, yearly_budget,
+)
+from anomaly import build_baseline, score_projects
+from network import build_network
+from scorecard import compute_all_scorecards, compute_scorecard
+
+__all__ = [
+    'average_delay_by_region', 'build_baseline', 'build_network', 'compute_all_scorecards', 'compute_scorecard',
+    'contractor_summary', 'delay_distribution', 'investment_by_region', 'national_kpis', 'projects_by_term',
+    'regional_totals', 'score_projects', 'top_agencies', 'top_anomalies', 'top_contractors', 'top_delayed_projects',
+    'watchlist_summary', 'watchlist_treemap', 'yearly_budget',
+]
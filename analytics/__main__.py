@@ -0,0 +1,23 @@
+import argparse
+import os
+
+from analytics.batch import RESULTS_DIR, precompute
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute every dashboard artefact into a versioned results directory.")
+    parser.add_argument('--output', default=RESULTS_DIR, help="Results directory (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    manifest = precompute(args.output, args.workers)
+    for name, stats in sorted(manifest['artefacts'].items()):
+        print(f"{name:<40} {stats['rows']:>10,} rows  {stats['seconds']:8.3f}s")
+    for name, error in sorted(manifest['errors'].items()):
+        print(f"{name:<40} FAILED: {error}")
+    print(f"Published results version {manifest['version']} to {args.output}")
+    return 1 if manifest['errors'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,203 @@
+"""Parallel batch precompute of every dashboard artefact into a versioned results directory."""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from functools import cached_property
+
+import pandas as pd
+
+from analytics import reports
+from budget_data import (
+    AGENCY_BUDGET_PATH, BUDGET_CLEANING_VERSION, BUDGET_SUMMARY_PATH, NEP_GAA_PATH,
+    build_agency_budgets, build_budget_summary, build_nep_gaa,
+)
+from contractor_index import ContractorIndex
+from anomaly import score_projects
+from dataset import load_project_baseline, load_project_frame, load_project_rollup, project_sources, sources_version
+from network import GROUP_COLUMNS, ContractorNetwork, build_network
+from project_data import CLEANING_VERSION, LAZY_COLUMNS
+from scorecard import ENTITY_COLUMNS, compute_scorecard
+from snapshot import file_fingerprint, load_snapshot
+
+RESULTS_DIR = 'results'
+LATEST_FILE = 'LATEST'
+
+# Bump whenever an artefact's computation changes so older results are ignored
+ANALYTICS_VERSION = 2
+
+BUDGET_PATHS = [BUDGET_SUMMARY_PATH, NEP_GAA_PATH, AGENCY_BUDGET_PATH]
+
+
+def _code_versions():
+    return [CLEANING_VERSION, BUDGET_CLEANING_VERSION, ANALYTICS_VERSION]
+
+
+class _Inputs:
+    """Inputs of the artefacts, loaded lazily once per worker process."""
+
+    def __init__(self, sources):
+        self.sources = sources
+
+    @cached_property
+    def df(self):
+        df = load_project_frame(self.sources, exclude=LAZY_COLUMNS)
+        return score_projects(df, load_project_baseline(df, self.sources))
+
+    @cached_property
+    def descriptions(self):
+        return load_project_frame(self.sources, columns=LAZY_COLUMNS)['ProjectDescription']
+
+    @cached_property
+    def cube(self):
+        return load_project_rollup(self.df, self.sources)
+
+    @cached_property
+    def index(self):
+        return ContractorIndex(self.df['Contractor'])
+
+    @cached_property
+    def budget_summary(self):
+        return load_snapshot('budget_summary', BUDGET_SUMMARY_PATH, build_budget_summary, BUDGET_CLEANING_VERSION)
+
+    @cached_property
+    def nep_gaa(self):
+        return load_snapshot('nep_gaa', NEP_GAA_PATH, build_nep_gaa, BUDGET_CLEANING_VERSION)
+
+    @cached_property
+    def agency_budgets(self):
+        return load_snapshot('agency_budgets', AGENCY_BUDGET_PATH, build_agency_budgets, BUDGET_CLEANING_VERSION)
+
+
+ARTEFACTS = {
+    'national_kpis': lambda i: reports.national_kpis(i.cube),
+    'investment_by_region': lambda i: reports.investment_by_region(i.cube),
+    'projects_by_term': lambda i: reports.projects_by_term(i.cube),
+    'contractor_summary': lambda i: reports.contractor_summary(i.cube),
+    'watchlist_summary': lambda i: reports.watchlist_summary(i.df, i.index),
+    'top_delayed_projects': lambda i: reports.top_delayed_projects(i.df, i.descriptions),
+    'top_anomalies': lambda i: reports.top_anomalies(i.df, i.descriptions),
+    'delay_distribution': lambda i: reports.delay_distribution(i.df),
+    'average_delay_by_region': lambda i: reports.average_delay_by_region(i.cube),
+    'regional_totals': lambda i: reports.regional_totals(i.cube),
+    'yearly_budget': lambda i: reports.yearly_budget(i.budget_summary),
+    'nep_gaa': lambda i: i.nep_gaa,
+    'top_agencies': lambda i: reports.top_agencies(i.agency_budgets),
+}
+for _agg_col in ENTITY_COLUMNS.values():
+    ARTEFACTS[f'scorecard_{_agg_col}'] = lambda i, agg_col=_agg_col: compute_scorecard(i.df, agg_col)
+
+
+def _network_artefacts(i, group_col):
+    network = build_network(i.df, group_col)
+    return {f'network_{part}_{group_col}': getattr(network, part) for part in ContractorNetwork._fields}
+
+
+# Tasks whose one computation yields several artefacts, so each is computed once, by one worker
+ARTEFACT_GROUPS = {
+    f'network_{_group_col}': lambda i, group_col=_group_col: _network_artefacts(i, group_col)
+    for _group_col in GROUP_COLUMNS.values()
+}
+
+_inputs = None
+
+
+def _init_worker(sources):
+    global _inputs
+    _inputs = _Inputs(sources)
+
+
+def _compute_task(name, out_dir):
+    """Computes one artefact, or one group of them, and returns the stats of each artefact written."""
+    start = time.perf_counter()
+    results = ARTEFACT_GROUPS[name](_inputs) if name in ARTEFACT_GROUPS else {name: ARTEFACTS[name](_inputs)}
+    for artefact, result in results.items():
+        result.to_parquet(os.path.join(out_dir, f'{artefact}.parquet'), index=False)
+    seconds = round(time.perf_counter() - start, 3)
+    return {artefact: {'rows': len(result), 'seconds': seconds} for artefact, result in results.items()}
+
+
+def _all_sources():
+    return project_sources() + [path for path in BUDGET_PATHS if os.path.exists(path)]
+
+
+def results_marker(results_dir=RESULTS_DIR):
+    """Cheap change marker for the sources and the latest results pointer."""
+    return sources_version(_all_sources() + [os.path.join(results_dir, LATEST_FILE)])
+
+
+def precompute(results_dir=RESULTS_DIR, workers=None):
+    """Computes every artefact in a process pool and publishes them as the latest results version."""
+    sources = project_sources()
+    # Build the snapshots (or dataset) once here, so the workers only memory-map them
+    inputs = _Inputs(sources)
+    inputs.df
+    for path, loader in [(BUDGET_SUMMARY_PATH, 'budget_summary'), (NEP_GAA_PATH, 'nep_gaa'), (AGENCY_BUDGET_PATH, 'agency_budgets')]:
+        if os.path.exists(path):
+            getattr(inputs, loader)
+
+    fingerprints = [{'path': path, 'fingerprint': file_fingerprint(path)} for path in _all_sources()]
+    version_key = json.dumps([fingerprints, *_code_versions()], sort_keys=True)
+    version = hashlib.sha1(version_key.encode()).hexdigest()[:12]
+    out_dir = os.path.join(results_dir, version)
+    os.makedirs(out_dir, exist_ok=True)
+
+    artefacts, errors = {}, {}
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(sources,)) as pool:
+        futures = {pool.submit(_compute_task, name, out_dir): name for name in [*ARTEFACTS, *ARTEFACT_GROUPS]}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                artefacts.update(future.result())
+            except Exception as e:
+                errors[name] = repr(e)
+
+    manifest = {
+        'version': version,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'sources': fingerprints,
+        'code_versions': _code_versions(),
+        'artefacts': artefacts,
+        'errors': errors,
+    }
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    latest_path = os.path.join(results_dir, LATEST_FILE)
+    with open(f'{latest_path}.tmp', 'w') as f:
+        f.write(version)
+    os.replace(f'{latest_path}.tmp', latest_path)
+    return manifest
+
+
+def current_results(results_dir=RESULTS_DIR):
+    """Returns (results path, manifest) of the latest results if they match the current sources and code, else None."""
+    try:
+        with open(os.path.join(results_dir, LATEST_FILE)) as f:
+            out_dir = os.path.join(results_dir, f.read().strip())
+        with open(os.path.join(out_dir, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    # Results computed by other cleaning or analytics code are stale even if the sources did not change
+    if manifest.get('code_versions') != _code_versions():
+        return None
+    recorded = manifest['sources']
+    if [entry['path'] for entry in recorded] != _all_sources():
+        return None
+    try:
+        for entry in recorded:
+            if file_fingerprint(entry['path'], entry['fingerprint']) != entry['fingerprint']:
+                return None
+    except OSError:
+        # A source removed since the last check: callers fall back to computing (and reporting) on demand
+        return None
+    return out_dir, manifest
+
+
+def read_artefact(out_dir, name):
+    """Reads one precomputed artefact."""
+    return pd.read_parquet(os.path.join(out_dir, f'{name}.parquet'))
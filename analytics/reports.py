@@ -0,0 +1,138 @@
+"""Streamlit-free computations behind every dashboard chart and table.
+
+Each function returns a DataFrame, so results can be cached, precomputed in batch and
+written to Parquet alike.
+"""
+import numpy as np
+import pandas as pd
+
+from anomaly import ANOMALY_THRESHOLD, bid_ratio_pct
+from contractor_index import CONTRACTORS_OF_INTEREST
+from rendering import histogram_frame, top_n_with_other
+from rollup import summarize, totals
+
+
+# --- National overview (Homepage) ---
+
+def national_kpis(cube):
+    """Headline KPIs as a one-row frame."""
+    national = totals(cube)
+    total_projects = int(national['Projects'])
+    delayed_projects = int(national['DelayedProjects'])
+    return pd.DataFrame([{
+        'TotalProjects': total_projects,
+        'TotalInvestment': national['ContractCost'],
+        'DelayedProjects': delayed_projects,
+        'DelayedShare': delayed_projects / total_projects if total_projects else 0.0,
+        'AverageDelay': national['AverageDelay'],
+    }])
+
+
+def investment_by_region(cube):
+    """Total contract cost per region, largest first."""
+    return summarize(cube, 'Region')['ContractCost'].sort_values(ascending=False).reset_index()
+
+
+def projects_by_term(cube):
+    """Number of projects per presidential term, most first."""
+    return summarize(cube, 'PresTerm')['Projects'].sort_values(ascending=False).rename('count').reset_index()
+
+
+# --- Contractors ---
+
+def contractor_summary(cube):
+    """Project count, value and delay stats per contractor."""
+    return summarize(cube, 'Contractor').reset_index()
+
+
+def top_contractors(summary, by, n=15):
+    """The n contractors with the highest value of `by` in a contractor_summary frame."""
+    return summary.nlargest(n, by)[['Contractor', by]]
+
+
+def watchlist_summary(df, index, patterns=CONTRACTORS_OF_INTEREST):
+    """Contract value and project count of the contractors matching a watchlist.
+
+    index is built over the unfiltered frame; df may be a filtered view of it, labelled by row position.
+    """
+    interest_df = df.loc[df.index.intersection(index.rows(index.match(patterns)))]
+    return interest_df.groupby('Contractor', observed=True).agg(
+        Total_Contract_Value=('ContractCost', 'sum'),
+        Number_of_Projects=('Contractor', 'count')
+    ).sort_values(by='Total_Contract_Value', ascending=False).reset_index().astype({'Contractor': object})
+
+
+def watchlist_treemap(summary):
+    """Treemap rows of a watchlist_summary, with the long tail folded into 'Others'."""
+    treemap = summary.rename(columns={'Total_Contract_Value': 'ContractCost'})[['Contractor', 'ContractCost']]
+    return top_n_with_other(treemap, 'Contractor', 'ContractCost')
+
+
+# --- Delays ---
+
+def top_delayed_projects(df, descriptions, n=20):
+    """The n most delayed projects, with their description and a short label for charts.
+
+    descriptions is the lazily loaded ProjectDescription column, aligned with df's index.
+    """
+    top_delayed = df[df['ProjectDelay'] > 0].nlargest(n, 'ProjectDelay')
+    description = descriptions.loc[top_delayed.index]
+    top_delayed = top_delayed.assign(
+        ProjectDescription=description,
+        ProjectLabel=description.str[:70] + '... (' + top_delayed['Province'].astype(object) + ')',
+    )
+    return top_delayed[['ProjectID', 'ProjectLabel', 'ProjectDescription', 'Province', 'ProjectDelay']]
+
+
+def top_anomalies(df, descriptions, n=20):
+    """The n projects with the highest anomaly score above ANOMALY_THRESHOLD for each reason it stands out.
+
+    Reasons are a delay, a high or a low bid ratio against the project's peers, so long delays
+    do not crowd out bid outliers. descriptions is the lazily loaded ProjectDescription column,
+    aligned with df's index.
+    """
+    outliers = df[df['AnomalyScore'] > ANOMALY_THRESHOLD]
+    reason = np.where(
+        outliers['DelayZ'] >= outliers['BidRatioZ'].abs(), 'Delay',
+        np.where(outliers['BidRatioZ'] > 0, 'High bid ratio', 'Low bid ratio'),
+    )
+    outliers = outliers.assign(Reason=reason).sort_values('AnomalyScore', ascending=False)
+    outliers = outliers[outliers.groupby('Reason').cumcount() < n]
+    outliers = outliers.assign(ProjectDescription=descriptions.loc[outliers.index], BidRatioPct=bid_ratio_pct(outliers))
+    columns = [
+        'ProjectID', 'ProjectDescription', 'Region_std', 'ImplementingOffice', 'Contractor', 'Reason', 'AnomalyScore',
+        'BidRatioPct', 'BidRatioZ', 'ProjectDelay', 'DelayZ',
+    ]
+    return outliers[columns].astype({col: object for col in ['Region_std', 'ImplementingOffice', 'Contractor']})
+
+
+def delay_distribution(df):
+    """Histogram bins of the positive project delays."""
+    delays = df['ProjectDelay'].to_numpy(dtype=float, na_value=np.nan)
+    return histogram_frame(delays[delays > 0])
+
+
+def average_delay_by_region(cube):
+    """Mean delay of delayed projects per region, shortest first."""
+    return summarize(cube, 'Region')['AverageDelay'].dropna().sort_values().rename('ProjectDelay').reset_index()
+
+
+# --- Regions ---
+
+def regional_totals(cube):
+    """Project count, value and delay stats per standardized region."""
+    return summarize(cube, 'Region_std').reset_index()
+
+
+# --- Budget ---
+
+def yearly_budget(budget_summary):
+    """Total DPWH budget per fiscal year."""
+    return budget_summary.groupby('FISCAL YEAR')['AMOUNT'].sum().reset_index()
+
+
+def top_agencies(agency_budgets, year='2025', n=10):
+    """The n agencies with the largest approved budget in the given year."""
+    budgets = agency_budgets[['Agency', year]].dropna()
+    budgets.columns = ['Agency', 'Budget']
+    return budgets.nlargest(n, 'Budget')
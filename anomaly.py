@@ -0,0 +1,138 @@
+"""Robust per-group anomaly scores of each project's bid ratio and delay.
+
+The baseline is a sparse histogram: project counts per (region, office, start year, measure,
+value bin). Like the rollup cube it is additive, so appended extracts update it with their
+own counts (and replaced projects with negated ones) instead of a rebuild. Medians and
+median absolute deviations (MAD) of any grouping are read off the histogram in one
+vectorized pass, and every project gets a robust z-score against its peers.
+"""
+import numpy as np
+import pandas as pd
+
+# Finest baseline grouping; coarser ones are re-summed from it
+BASELINE_DIMENSIONS = ['Region_std', 'ImplementingOffice', 'StartYear']
+
+# Peer groups from finest to coarsest; a project is scored against the finest one with enough projects
+BASELINE_LEVELS = [['Region_std', 'ImplementingOffice', 'StartYear'], ['Region_std', 'StartYear'], ['StartYear'], []]
+MIN_BASELINE_PROJECTS = 30
+
+# Histogram bin width of each measure: tenths of a percentage point of bid ratio, whole days of delay
+BIN_WIDTH = {'BidRatioPct': 0.1, 'ProjectDelay': 1.0}
+
+# Lower bound on the robust standard deviation, so near-constant peer groups do not flag tiny deviations
+MIN_SCALE = {'BidRatioPct': 0.5, 'ProjectDelay': 30.0}
+
+# Modified z-score above which a project is an outlier (Iglewicz and Hoaglin)
+ANOMALY_THRESHOLD = 3.5
+
+# MAD of a normal distribution times this is its standard deviation
+MAD_TO_SD = 1.4826
+
+
+def bid_ratio_pct(df):
+    """Contract cost as a percentage of the approved budget, missing where the budget is not positive."""
+    budget = df['ApprovedBudgetForTheContract']
+    return (df['ContractCost'] / budget.where(budget > 0) * 100).astype('float64')
+
+
+def _measures(df):
+    return {'BidRatioPct': bid_ratio_pct(df), 'ProjectDelay': df['ProjectDelay'].astype('float64')}
+
+
+def _keys(df):
+    return [df['Region_std'], df['ImplementingOffice'], df['StartDate'].dt.year.rename('StartYear')]
+
+
+def build_baseline(df):
+    """Counts the projects per baseline group, measure and value bin."""
+    parts = []
+    for measure, values in _measures(df).items():
+        valid = values.notna()
+        bins = np.round(values[valid] / BIN_WIDTH[measure]).astype('int64').rename('Bin')
+        keys = [key[valid] for key in _keys(df)]
+        counts = bins.groupby(keys + [bins], dropna=False, observed=True).size().rename('Count').reset_index()
+        parts.append(counts.assign(Measure=measure))
+    baseline = pd.concat(parts, ignore_index=True)
+    return baseline[BASELINE_DIMENSIONS + ['Measure', 'Bin', 'Count']]
+
+
+def combine_baselines(baselines):
+    """Folds partial baselines, including negated ones of replaced projects, dropping emptied bins."""
+    baselines = list(baselines)
+    # Partial baselines that cancelled out are empty; left out unless all are, as concat deprecates mixing them in
+    baselines = [baseline for baseline in baselines if len(baseline)] or baselines[:1]
+    combined = (
+        pd.concat(baselines, ignore_index=True)
+        .groupby(BASELINE_DIMENSIONS + ['Measure', 'Bin'], dropna=False, observed=True)['Count'].sum()
+        .reset_index()
+    )
+    return combined[combined['Count'] != 0].reset_index(drop=True)
+
+
+def _weighted_median(group, values, counts):
+    """Median per group of a histogram whose rows are contiguous per group and sorted by value within it."""
+    n = np.bincount(group, weights=counts).astype('int64')
+    cumulative = np.cumsum(counts)
+    last_row = np.cumsum(np.bincount(group)) - 1
+    offset = cumulative[last_row] - n
+    # 1-based ranks of the two middle projects, equal when n is odd
+    low = np.searchsorted(cumulative, offset + (n + 1) // 2)
+    high = np.searchsorted(cumulative, offset + n // 2 + 1)
+    return (values[low] + values[high]) / 2, n
+
+
+def baseline_stats(baseline, keys):
+    """Median, MAD and project count of each measure per group of keys, in measure units."""
+    by = list(keys) + ['Measure']
+    hist = baseline.groupby(by + ['Bin'], dropna=False, observed=True)['Count'].sum()
+    hist = hist[hist > 0].reset_index()
+    group = hist.groupby(by, dropna=False, observed=True, sort=False).ngroup().to_numpy()
+    bins = hist['Bin'].to_numpy(dtype='float64')
+    counts = hist['Count'].to_numpy()
+
+    median, n = _weighted_median(group, bins, counts)
+    deviation = np.abs(bins - median[group])
+    order = np.lexsort((deviation, group))
+    mad, _ = _weighted_median(group[order], deviation[order], counts[order])
+
+    stats = hist.drop_duplicates(by)[by].reset_index(drop=True)
+    width = stats['Measure'].map(BIN_WIDTH).to_numpy()
+    return stats.assign(Median=median * width, MAD=mad * width, Projects=n)
+
+
+def _key_frame(frame, level):
+    # Plain dtypes on both sides of the join, plus a constant key so the national level joins like the others
+    keys = frame[level].astype({col: 'int64' if col == 'StartYear' else object for col in level})
+    return keys.assign(_all=0)
+
+
+def score_projects(df, baseline):
+    """Adds robust z-scores of each project's bid ratio and delay against its peer group.
+
+    BidRatioZ is signed, as unusually low and unusually high bids are both anomalous; DelayZ
+    only matters when positive. AnomalyScore is the larger of |BidRatioZ| and DelayZ.
+    """
+    keys = pd.concat(_keys(df), axis=1)
+    measures = _measures(df)
+    median = {measure: np.full(len(df), np.nan) for measure in measures}
+    scale = {measure: np.full(len(df), np.nan) for measure in measures}
+    # Coarsest first, so finer groups with enough projects overwrite their fallback
+    for level in reversed(BASELINE_LEVELS):
+        stats = baseline_stats(baseline, level)
+        stats = stats[stats['Projects'] >= MIN_BASELINE_PROJECTS]
+        project_keys = _key_frame(keys, level)
+        for measure in measures:
+            peer_stats = stats[stats['Measure'] == measure]
+            peer_stats = pd.concat([_key_frame(peer_stats, level), peer_stats[['Median', 'MAD']]], axis=1)
+            peers = project_keys.merge(peer_stats, on=level + ['_all'], how='left')
+            found = peers['Median'].notna().to_numpy()
+            median[measure][found] = peers['Median'].to_numpy()[found]
+            robust_sd = peers['MAD'].to_numpy()[found] * MAD_TO_SD
+            scale[measure][found] = np.maximum(robust_sd, MIN_SCALE[measure])
+
+    bid_z, delay_z = ((values.to_numpy() - median[measure]) / scale[measure] for measure, values in measures.items())
+    return df.assign(
+        BidRatioZ=bid_z.astype('float32'),
+        DelayZ=delay_z.astype('float32'),
+        AnomalyScore=np.fmax(np.abs(bid_z), delay_z).astype('float32'),
+    )
@@ -0,0 +1,88 @@
+"""Seeded generator of synthetic DPWH-shaped flood control project extracts.
+
+Usage: python -m benchmarks.generate --rows 100000 --output data/synthetic.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+REGIONS = [
+    'REGION I', 'REGION II', 'REGION III', 'REGION IV-A', 'REGION IV-B', 'REGION V', 'REGION VI',
+    'REGION VII', 'REGION VIII', 'REGION IX', 'REGION X', 'REGION XI', 'REGION XII', 'REGION XIII',
+    'CAR', 'NCR', 'BARMM',
+]
+PRES_TERMS = ['Aquino', 'Duterte', 'Marcos Jr.']
+PROVINCES_PER_REGION = 6
+OFFICES_PER_PROVINCE = 3
+CHUNK_ROWS = 500_000
+
+
+def contractor_count(rows):
+    """Number of distinct contractors, growing sub-linearly with the extract size."""
+    return max(50, int(rows ** 0.6))
+
+
+def generate_chunk(rng, rows, n_contractors, start_id=0):
+    """Generates one chunk of raw project rows in the layout of data/Flood_Control_Data.csv."""
+    region_idx = rng.integers(0, len(REGIONS), rows)
+    province_idx = region_idx * PROVINCES_PER_REGION + rng.integers(0, PROVINCES_PER_REGION, rows)
+    office_idx = province_idx * OFFICES_PER_PROVINCE + rng.integers(0, OFFICES_PER_PROVINCE, rows)
+
+    # Zipf-skewed awards: a handful of contractors win a large share of the projects
+    contractor_idx = (rng.zipf(1.3, rows) - 1) % n_contractors
+    contractor_suffix = np.where(rng.random(rows) < 0.3, ' (JV)', '')
+
+    start = np.datetime64('2011-01-01') + rng.integers(0, 15 * 365, rows).astype('timedelta64[D]')
+    original = start + rng.integers(90, 720, rows).astype('timedelta64[D]')
+    delay = np.where(rng.random(rows) < 0.4, rng.gamma(1.5, 90, rows), -rng.integers(0, 30, rows)).astype(int)
+    actual = original + delay.astype('timedelta64[D]')
+
+    budget = np.round(rng.lognormal(17, 1.0, rows), 2)
+    cost = np.round(budget * rng.uniform(0.85, 1.0, rows), 2)
+    # Some contracts are awarded at (almost) the full approved budget
+    cost = np.where(rng.random(rows) < 0.15, np.round(budget * 0.999, 2), cost)
+
+    ids = np.arange(start_id, start_id + rows)
+    df = pd.DataFrame({
+        'ProjectID': pd.Series(ids).map('P{:08d}'.format),
+        'ProjectDescription': pd.Series(ids).map('Construction of Flood Control Structure Package {}'.format),
+        'Region': np.array(REGIONS)[region_idx],
+        'Province': pd.Series(province_idx).map('PROVINCE {}'.format),
+        'ImplementingOffice': pd.Series(office_idx).map('DISTRICT ENGINEERING OFFICE {}'.format),
+        'Contractor': pd.Series(contractor_idx).map(' Contractor {} Construction '.format) + contractor_suffix,
+        'PresTerm': np.array(PRES_TERMS)[np.minimum((start - np.datetime64('2011-01-01')).astype(int) // (6 * 365), 2)],
+        'StartDate': start.astype(str),
+        'CompletionDateOriginal': original.astype(str),
+        'CompletionDateActual': actual.astype(str),
+        'ApprovedBudgetForTheContract': budget,
+        'ContractCost': cost,
+    })
+    # A small share of incomplete rows, dropped by the cleaning step
+    missing = rng.random(rows) < 0.01
+    df.loc[missing, 'CompletionDateActual'] = ''
+    return df
+
+
+def write_csv(path, rows, seed=0):
+    """Writes a synthetic extract of the given size to path, chunk by chunk to bound memory."""
+    rng = np.random.default_rng(seed)
+    n_contractors = contractor_count(rows)
+    for offset in range(0, rows, CHUNK_ROWS):
+        chunk = generate_chunk(rng, min(CHUNK_ROWS, rows - offset), n_contractors, offset)
+        chunk.to_csv(path, mode='w' if offset == 0 else 'a', header=offset == 0, index=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='data/synthetic_projects.csv')
+    args = parser.parse_args()
+    write_csv(args.output, args.rows, args.seed)
+    print(f"Wrote {args.rows:,} rows to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
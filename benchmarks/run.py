@@ -0,0 +1,213 @@
+"""Headless benchmarks of the data loading and page aggregation logic on synthetic extracts.
+
+Usage: python -m benchmarks.run --sizes 10000 100000 1000000 --output benchmark_report.json
+"""
+import argparse
+import gc
+import json
+import os
+import pickle
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import project_store
+import snapshot
+from analytics import reports
+from anomaly import build_baseline, combine_baselines, score_projects
+from benchmarks.generate import write_csv
+from budget_data import (
+    AGENCY_BUDGET_PATH, BUDGET_CLEANING_VERSION, BUDGET_SUMMARY_PATH, NEP_GAA_PATH,
+    build_agency_budgets, build_budget_summary, build_nep_gaa,
+)
+from contractor_index import CONTRACTORS_OF_INTEREST, ContractorIndex
+from network import GROUP_COLUMNS, build_network
+from project_data import CLEANING_VERSION, LAZY_COLUMNS, build_project_data, iter_project_data, write_project_parquet
+from rendering import TABLE_PAGE_SIZE, sorted_window
+from rollup import build_rollup, combine_rollups
+from scorecard import ENTITY_COLUMNS, compute_scorecard
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+
+
+def measure(fn, *args):
+    """Runs fn(*args) and returns (result, wall seconds, peak traced MB)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak / 1e6
+
+
+# --- Page aggregation stages: the analytics.reports calls each page makes per rerun, plus its first table page ---
+
+def _with_descriptions(rows, descriptions):
+    return rows.assign(ProjectDescription=descriptions.loc[rows.index])
+
+
+def homepage(cube):
+    return reports.national_kpis(cube), reports.investment_by_region(cube), reports.projects_by_term(cube)
+
+
+def contractor_analysis(df, cube, index, descriptions):
+    summary = reports.contractor_summary(cube)
+    top_contractor = summary.nlargest(1, 'Projects')['Contractor'].iloc[0]
+    drill_down = _with_descriptions(df.loc[df.index.intersection(index.rows_for(top_contractor))], descriptions)
+    return (
+        reports.top_contractors(summary, 'Projects'), reports.top_contractors(summary, 'ContractCost'),
+        sorted_window(drill_down, 'ProjectDelay', False, 0, TABLE_PAGE_SIZE),
+    )
+
+
+def project_delay_analysis(df, cube, descriptions):
+    return (
+        reports.top_delayed_projects(df, descriptions), reports.delay_distribution(df),
+        reports.average_delay_by_region(cube),
+    )
+
+
+def regional_map(cube):
+    return reports.regional_totals(cube)
+
+
+def investigative_insights(df, index):
+    # The real watchlist barely matches synthetic names, so the first 100 contractors are watched too
+    summary = reports.watchlist_summary(df, index, CONTRACTORS_OF_INTEREST + index.names[:100])
+    return summary, reports.watchlist_treemap(summary)
+
+
+def project_scorecard(df, agg_col, descriptions):
+    scorecard = compute_scorecard(df, agg_col)
+    entity = scorecard.nlargest(1, 'Total_Contract_Value')[agg_col].iloc[0]
+    entity_df = df[df[agg_col] == entity]
+    delayed = _with_descriptions(entity_df[entity_df['ProjectDelay'] > 0].nlargest(5, 'ProjectDelay'), descriptions)
+    contractors = entity_df.groupby('Contractor', observed=True)['ContractCost'].sum().nlargest(5)
+    return sorted_window(scorecard, 'Total_Contract_Value', False, 0, TABLE_PAGE_SIZE), delayed, contractors
+
+
+def store_drill_down(store, agg_col, entity):
+    filters = {agg_col: entity}
+    return (
+        project_store.top_delayed(store, filters, ['ProjectDescription', 'ProjectDelay'], n=5),
+        project_store.value_by(store, 'Contractor', filters, n=5),
+        project_store.query_projects(store, filters, sort_by='ProjectDelay', ascending=False, limit=100),
+    )
+
+
+def benchmark_size(rows, workdir, seed):
+    """Generates an extract of the given size and times every stage on it."""
+    csv_path = os.path.join(workdir, f'projects_{rows}.csv')
+    write_csv(csv_path, rows, seed)
+    snapshot.CACHE_DIR = os.path.join(workdir, 'cache')
+
+    results = []
+
+    def record(stage, fn, *args):
+        result, seconds, peak_mb = measure(fn, *args)
+        results.append({'rows': rows, 'stage': stage, 'seconds': round(seconds, 4), 'peak_mb': round(peak_mb, 1)})
+        print(f"{rows:>11,} rows  {stage:<44} {seconds:9.3f}s  {peak_mb:9.1f} MB", file=sys.stderr)
+        return result
+
+    record('load.read_and_clean', build_project_data, csv_path)
+    record('load.streaming_parquet_write', write_project_parquet, csv_path, os.path.join(workdir, 'streamed.parquet'))
+    record('load.streaming_rollup', lambda path: combine_rollups(build_rollup(c) for c in iter_project_data(path)), csv_path)
+    record('load.snapshot_build', snapshot.load_snapshot, 'project_data', csv_path, build_project_data, CLEANING_VERSION)
+    df = record(
+        'load.snapshot_read',
+        lambda path: snapshot.load_snapshot('project_data', path, build_project_data, CLEANING_VERSION, exclude=LAZY_COLUMNS),
+        csv_path,
+    )
+    # What a cache_data hit costs each caller, against the shared copy-on-write view that replaced it
+    descriptions = record(
+        'load.descriptions',
+        lambda path: snapshot.load_snapshot(
+            'project_data', path, build_project_data, CLEANING_VERSION, columns=LAZY_COLUMNS,
+        )['ProjectDescription'],
+        csv_path,
+    )
+    record('load.cache_data_copy', lambda frame: pickle.loads(pickle.dumps(frame)), df)
+    record('load.shared_view', lambda frame: frame.copy(deep=False), df)
+    cube = record('load.rollup', build_rollup, df)
+    baseline = record('load.anomaly_baseline', build_baseline, df)
+    # Appending an extract of 10% new projects only folds its own histogram into the baseline
+    record('load.anomaly_baseline_append', lambda base, new: combine_baselines([base, build_baseline(new)]), baseline, df.tail(rows // 10))
+    df = record('load.anomaly_scores', score_projects, df, baseline)
+    index = record('load.contractor_index', ContractorIndex, df['Contractor'])
+
+    record('page.homepage', homepage, cube)
+    record('page.contractor_analysis', contractor_analysis, df, cube, index, descriptions)
+    record('page.project_delay_analysis', project_delay_analysis, df, cube, descriptions)
+    record('page.regional_map', regional_map, cube)
+    record('page.investigative_insights', investigative_insights, df, index)
+    for agg_col in ENTITY_COLUMNS.values():
+        record(f'page.project_scorecard.{agg_col}', project_scorecard, df, agg_col, descriptions)
+    record('page.project_scorecard.top_anomalies', reports.top_anomalies, df, descriptions)
+    for group_col in GROUP_COLUMNS.values():
+        record(f'network.build.{group_col}', build_network, df, group_col)
+
+    store = record('store.build', project_store.sync_store, [csv_path], os.path.join(workdir, 'projects.sqlite'))
+    for agg_col in ENTITY_COLUMNS.values():
+        entity = df[agg_col].value_counts().index[0]
+        record(f'store.drill_down.{agg_col}', store_drill_down, store, agg_col, entity)
+        record(f'frame.drill_down.{agg_col}', lambda col, value: df[df[col] == value].nlargest(5, 'ProjectDelay'), agg_col, entity)
+
+    os.remove(csv_path)
+    return results
+
+
+def benchmark_budget(workdir):
+    """Times the budget workbook loaders, cold and from the snapshot cache."""
+    snapshot.CACHE_DIR = os.path.join(workdir, 'cache')
+    results = []
+    for name, path, build_fn in [
+        ('budget_summary', BUDGET_SUMMARY_PATH, build_budget_summary),
+        ('nep_gaa', NEP_GAA_PATH, build_nep_gaa),
+        ('agency_budgets', AGENCY_BUDGET_PATH, build_agency_budgets),
+    ]:
+        if not os.path.exists(path):
+            continue
+        for stage in ('build', 'read'):
+            _, seconds, peak_mb = measure(snapshot.load_snapshot, name, path, build_fn, BUDGET_CLEANING_VERSION)
+            results.append({'rows': None, 'stage': f'budget.{name}.{stage}', 'seconds': round(seconds, 4), 'peak_mb': round(peak_mb, 1)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES[:2])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_report.json')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.sizes:
+            results.extend(benchmark_size(rows, workdir, args.seed))
+        results.extend(benchmark_budget(workdir))
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'seed': args.seed,
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} measurements to {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+BUDGET_SUMMARY_PATH = 'data/DPWH_budget_consolidated.xlsx'
+BUDGET_SUMMARY_SHEET = 'WIP - DPWH Budget Summary 2011-'
+NEP_GAA_PATH = 'data/NEP v GAA Comparison.xlsx'
+NEP_GAA_SHEET = 'Sheet1'
+AGENCY_BUDGET_PATH = 'data/NGAs Budget per FY.xlsx'
+AGENCY_BUDGET_SHEET = 'TOTAL GAA per Agency'
+
+# Bump whenever a budget table builder changes so cached snapshots are rebuilt
+BUDGET_CLEANING_VERSION = 1
+
+
+def clean_currency(series):
+    """Strips thousands separators from a column and converts it to numeric."""
+    return pd.to_numeric(series.astype(str).str.replace(',', ''), errors='coerce')
+
+
+def _read_sheet(file_path, sheet_name, **kwargs):
+    # openpyxl is opened in read-only streaming mode, which skips styles and formulas
+    return pd.read_excel(file_path, sheet_name=sheet_name, engine='openpyxl', **kwargs)
+
+
+def find_cell(raw, label):
+    """Returns the (row, column) position of the first cell containing label, or None."""
+    matches = raw.apply(lambda col: col.astype(str).str.contains(label, regex=False)).to_numpy()
+    if not matches.any():
+        return None
+    row = int(np.flatnonzero(matches.any(axis=1))[0])
+    return row, int(np.flatnonzero(matches[row])[0])
+
+
+def build_budget_summary(file_path):
+    """Reads the DPWH budget summary sheet, keeping only the fiscal year and amount."""
+    df = _read_sheet(file_path, BUDGET_SUMMARY_SHEET, usecols=['FISCAL YEAR', 'AMOUNT'])
+    df['AMOUNT'] = clean_currency(df['AMOUNT'])
+    return df
+
+
+def build_nep_gaa(file_path):
+    """Reads the 2025 NEP vs. GAA comparison and keeps the cleaned DPWH programs."""
+    df = _read_sheet(file_path, NEP_GAA_SHEET, header=0, usecols='A:D')
+    df.columns = ['Program', 'NEP', 'GAA', 'Variance']
+    df['Program'] = df['Program'].astype(str)
+    df = df[df['Program'].str.contains('DPWH', na=False)].copy()
+
+    for col in ['NEP', 'GAA', 'Variance']:
+        df[col] = clean_currency(df[col])
+
+    df['Program'] = df['Program'].str.replace('-', '').str.strip()
+    return df.reset_index(drop=True)
+
+
+def build_agency_budgets(file_path):
+    """Reads the GAA per agency sheet into one row per agency and one column per fiscal year (in PHP).
+
+    The agency names start below the 'AGENCY NAME' cell, while the fiscal years sit in a
+    header row above it, so both are located by searching the sheet rather than by position.
+    """
+    raw = _read_sheet(file_path, AGENCY_BUDGET_SHEET, header=None)
+    position = find_cell(raw, 'AGENCY NAME')
+    if position is None:
+        raise ValueError(f"Could not find the header row ('AGENCY NAME') in the '{AGENCY_BUDGET_SHEET}' sheet.")
+    header_row, agency_col = position
+
+    # The year header is the row above 'AGENCY NAME' with the most year-like cells
+    years = raw.iloc[:header_row].apply(pd.to_numeric, errors='coerce')
+    year_cells = years.where((years >= 1900) & (years <= 2100))
+    year_row = year_cells.notna().sum(axis=1).idxmax()
+    year_columns = year_cells.loc[year_row].dropna().astype(int)
+
+    body = raw.iloc[header_row + 1:]
+    df = pd.DataFrame({'Agency': body.iloc[:, agency_col].astype(str)})
+    for col, year in year_columns.items():
+        df[str(year)] = clean_currency(body[col]) * 1000
+    df = df[body.iloc[:, agency_col].notna()]
+    return df.dropna(subset=[str(year) for year in year_columns], how='all').reset_index(drop=True)
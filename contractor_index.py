@@ -0,0 +1,111 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+NGRAM_SIZE = 3
+
+# Contractors named in the policy note and related inquiries
+CONTRACTORS_OF_INTEREST = [
+    'LEGACY CONSTRUCTION', 'AL-JANA CONSTRUCTION', 'L.L.M. CONSTRUCTION',
+    'R.D. INTERIOR JUNIOR CONSTRUCTION', 'ST. GERRARD CONSTRUCTION',
+    'IBAYO CONSTRUCTION', 'A.M.S. GONZALES', 'B.M.D. CONSTRUCTION', 'R.D. DISCAYA'
+]
+
+
+def canonicalize(name):
+    """Normalizes a contractor name for matching: upper case, punctuation dropped, single spaces."""
+    name = re.sub(r'[^0-9A-Z ]+', '', str(name).upper())
+    return ' '.join(name.split())
+
+
+def _ngrams(text):
+    padded = f' {text} '
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+
+class ContractorIndex:
+    """Maps contractors to integer codes and row positions, with an n-gram index for watchlist matching.
+
+    Lookups cost time proportional to the matched contractors and rows, not the whole table.
+    """
+
+    def __init__(self, contractors):
+        codes, names = pd.factorize(contractors, sort=True)
+        self.names = names.tolist()
+        self.codes = codes.astype(np.int32)
+
+        # Row positions grouped by contractor code, CSR style: rows of code c are order[offsets[c]:offsets[c + 1]]
+        self._order = np.argsort(self.codes, kind='stable')
+        counts = np.bincount(self.codes[self.codes >= 0], minlength=len(self.names))
+        self._offsets = np.concatenate([[0], np.cumsum(counts)]) + np.count_nonzero(self.codes < 0)
+        self._code_of = {name: code for code, name in enumerate(self.names)}
+
+        self._canonical = [canonicalize(name) for name in self.names]
+        self._postings = {}
+        self._gram_counts = np.zeros(len(self.names), dtype=np.int32)
+        for code, canonical in enumerate(self._canonical):
+            grams = _ngrams(canonical)
+            self._gram_counts[code] = len(grams)
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(code)
+        self._postings = {gram: np.array(codes, dtype=np.int32) for gram, codes in self._postings.items()}
+
+    def code(self, name):
+        """Returns the integer code of an exact contractor name, or None if it is unknown."""
+        return self._code_of.get(name)
+
+    def rows(self, codes):
+        """Returns the sorted row positions of the given contractor codes."""
+        codes = np.atleast_1d(np.asarray(codes, dtype=np.int64))
+        if codes.size == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate([self._order[self._offsets[c]:self._offsets[c + 1]] for c in codes]))
+
+    def rows_for(self, name):
+        """Returns the row positions of one contractor by exact name."""
+        code = self.code(name)
+        return self.rows([] if code is None else [code])
+
+    def _candidates(self, grams):
+        postings = [self._postings.get(gram) for gram in grams]
+        if any(p is None for p in postings):
+            return np.empty(0, dtype=np.int32)
+        postings.sort(key=len)
+        candidates = postings[0]
+        for p in postings[1:]:
+            candidates = np.intersect1d(candidates, p, assume_unique=True)
+        return candidates
+
+    def search(self, pattern):
+        """Returns the codes of contractors whose canonical name contains the canonical pattern."""
+        pattern = canonicalize(pattern)
+        if not pattern:
+            return np.empty(0, dtype=np.int32)
+        padded = f' {pattern} '
+        # Only the inner n-grams are guaranteed to occur in a name containing the pattern
+        grams = {padded[i:i + NGRAM_SIZE] for i in range(1, len(padded) - NGRAM_SIZE)}
+        if grams:
+            candidates = self._candidates(grams)
+        else:
+            candidates = np.arange(len(self.names), dtype=np.int32)
+        return np.array([c for c in candidates if pattern in self._canonical[c]], dtype=np.int32)
+
+    def fuzzy_search(self, pattern, min_similarity=0.6):
+        """Returns the codes of contractors whose n-gram Jaccard similarity to the pattern is high enough."""
+        grams = _ngrams(canonicalize(pattern))
+        if not grams:
+            return np.empty(0, dtype=np.int32)
+        shared = np.zeros(len(self.names), dtype=np.int32)
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is not None:
+                shared[postings] += 1
+        candidates = np.flatnonzero(shared)
+        similarity = shared[candidates] / (len(grams) + self._gram_counts[candidates] - shared[candidates])
+        return candidates[similarity >= min_similarity].astype(np.int32)
+
+    def match(self, patterns, fuzzy=False, min_similarity=0.6):
+        """Returns the codes of contractors matching any of the watchlist patterns."""
+        matches = [self.fuzzy_search(p, min_similarity) if fuzzy else self.search(p) for p in patterns]
+        return np.unique(np.concatenate(matches)) if matches else np.empty(0, dtype=np.int32)
@@ -0,0 +1,262 @@
+"""Append-only project dataset built from the base extract plus later extract drops.
+
+Each extract is cleaned once into its own Parquet part. A ProjectID -> part map keeps the
+latest version of every project (last write wins) and the rollup cube and anomaly baseline
+are updated with the delta only, so refreshing costs time proportional to the new extract,
+not the archive. Extracts over STREAMING_THRESHOLD_BYTES, such as a nationwide base extract,
+are cleaned and folded into the deltas chunk by chunk, bounding peak memory.
+"""
+import glob
+import json
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from anomaly import build_baseline, combine_baselines
+from project_data import (
+    CATEGORY_COLUMNS, CHUNK_ROWS, CLEANING_VERSION, PROJECT_DATA_PATH, STREAMING_THRESHOLD_BYTES,
+    build_project_data, write_project_parquet,
+)
+from rollup import ROLLUP_MEASURES, build_rollup, combine_rollups
+from snapshot import CACHE_DIR, file_fingerprint, load_snapshot, read_columns
+
+EXTRACTS_DIR = 'data/extracts'
+DATASET_DIR = os.path.join(CACHE_DIR, 'dataset')
+
+# Bump whenever the files derived per dataset change, e.g. rollup.parquet or baseline.parquet
+DATASET_VERSION = 2
+
+
+def project_sources():
+    """Returns the base extract followed by the appended extracts, in ingest (file name) order."""
+    return [PROJECT_DATA_PATH] + sorted(glob.glob(os.path.join(EXTRACTS_DIR, '*.csv')))
+
+
+def sources_version(sources):
+    """Cheap change marker for the sources: path, size and mtime of each file (None if missing)."""
+    version = []
+    for path in sources:
+        try:
+            stat = os.stat(path)
+            version.append((path, stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            version.append((path, None, None))
+    return tuple(version)
+
+
+def _path(dataset_dir, name):
+    return os.path.join(dataset_dir, name)
+
+
+def _manifest_key():
+    return [CLEANING_VERSION, DATASET_VERSION]
+
+
+def _read_manifest(dataset_dir):
+    try:
+        with open(_path(dataset_dir, 'manifest.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'version': _manifest_key(), 'extracts': []}
+
+
+def _write_parquet(df, path):
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def _write_manifest(dataset_dir, manifest):
+    path = _path(dataset_dir, 'manifest.json')
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def _read_or_empty(path, columns):
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+    return pd.DataFrame(columns=columns)
+
+
+def _negate(cube, measures=ROLLUP_MEASURES):
+    cube = cube.copy()
+    cube[measures] = -cube[measures]
+    return cube
+
+
+def _iter_part(path, ids=None):
+    """Yields a Parquet part in chunks of at most CHUNK_ROWS rows, only the rows of the given ProjectIDs if any."""
+    value_set = None if ids is None else pa.array(ids.to_numpy(dtype=object), type=pa.string())
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=CHUNK_ROWS):
+        if value_set is not None:
+            batch = batch.filter(pc.is_in(batch.column('ProjectID'), value_set=value_set))
+        yield batch.to_pandas()
+
+
+def _fold(cube, baseline, rows, negate=False):
+    """Adds the rollup and baseline of rows to the running deltas, or subtracts them with negate."""
+    rows_cube, rows_baseline = build_rollup(rows), build_baseline(rows)
+    if negate:
+        rows_cube, rows_baseline = _negate(rows_cube), _negate(rows_baseline, ['Count'])
+    cube = rows_cube if cube is None else combine_rollups([cube, rows_cube])
+    baseline = rows_baseline if baseline is None else combine_baselines([baseline, rows_baseline])
+    return cube, baseline
+
+
+def _write_part(csv_path, part_path):
+    """Cleans an extract into its Parquet part, the last row of each ProjectID winning.
+
+    Returns the part's ProjectIDs and its rollup cube and anomaly baseline. Large extracts are
+    streamed into the part and read back a chunk at a time, so only their ProjectIDs are ever
+    held in full.
+    """
+    if os.path.getsize(csv_path) <= STREAMING_THRESHOLD_BYTES:
+        rows = build_project_data(csv_path)
+        _write_parquet(rows, part_path)
+        return rows['ProjectID'].dropna(), build_rollup(rows), build_baseline(rows)
+
+    tmp_path = f'{part_path}.tmp-{os.getpid()}'
+    write_project_parquet(csv_path, tmp_path)
+    cube = baseline = None
+    for rows in _iter_part(tmp_path):
+        cube, baseline = _fold(cube, baseline, rows)
+    os.replace(tmp_path, part_path)
+    return pd.read_parquet(part_path, columns=['ProjectID'])['ProjectID'].dropna(), cube, baseline
+
+
+def append_extract(csv_path, dataset_dir=DATASET_DIR):
+    """Cleans one new extract and merges it into the dataset, replacing projects it updates."""
+    os.makedirs(dataset_dir, exist_ok=True)
+    manifest = _read_manifest(dataset_dir)
+    part = len(manifest['extracts'])
+
+    new_ids, cube, baseline = _write_part(csv_path, _path(dataset_dir, f'part-{part:05d}.parquet'))
+    id_map = _read_or_empty(_path(dataset_dir, 'project_ids.parquet'), ['ProjectID', 'part'])
+    replaced = id_map[id_map['ProjectID'].isin(new_ids)]
+
+    # Only the parts holding replaced projects are read, a chunk at a time, and only their replaced rows converted
+    for old_part, ids in replaced.groupby('part')['ProjectID']:
+        for rows in _iter_part(_path(dataset_dir, f'part-{old_part:05d}.parquet'), ids):
+            if len(rows):
+                cube, baseline = _fold(cube, baseline, rows, negate=True)
+
+    old_cube = _read_or_empty(_path(dataset_dir, 'rollup.parquet'), None)
+    cube = combine_rollups(c for c in [old_cube, cube] if len(c.columns))
+    cube = cube[cube['Projects'] != 0].reset_index(drop=True)
+    old_baseline = _read_or_empty(_path(dataset_dir, 'baseline.parquet'), None)
+    baseline = combine_baselines(b for b in [old_baseline, baseline] if len(b.columns))
+
+    id_map = pd.concat([
+        id_map[~id_map['ProjectID'].isin(replaced['ProjectID'])],
+        pd.DataFrame({'ProjectID': new_ids.to_numpy(), 'part': part}),
+    ], ignore_index=True)
+    _write_parquet(id_map, _path(dataset_dir, 'project_ids.parquet'))
+    _write_parquet(cube, _path(dataset_dir, 'rollup.parquet'))
+    _write_parquet(baseline, _path(dataset_dir, 'baseline.parquet'))
+
+    manifest['extracts'].append({'path': csv_path, 'fingerprint': file_fingerprint(csv_path), 'part': part})
+    _write_manifest(dataset_dir, manifest)
+    return manifest
+
+
+def sync_dataset(sources, dataset_dir=DATASET_DIR):
+    """Appends any sources not yet in the dataset.
+
+    The dataset is rebuilt from scratch when an already ingested extract changed, disappeared or
+    moved in the ingest order, or when the cleaning logic or the derived files changed.
+    """
+    manifest = _read_manifest(dataset_dir)
+    ingested = manifest['extracts']
+    is_prefix = (
+        manifest['version'] == _manifest_key()
+        and len(ingested) <= len(sources)
+        and all(
+            entry['path'] == path and file_fingerprint(path, entry['fingerprint']) == entry['fingerprint']
+            for entry, path in zip(ingested, sources)
+        )
+    )
+    if not is_prefix:
+        shutil.rmtree(dataset_dir, ignore_errors=True)
+        ingested = []
+
+    for path in sources[len(ingested):]:
+        manifest = append_extract(path, dataset_dir)
+    return manifest
+
+
+def load_dataset(dataset_dir=DATASET_DIR, columns=None, exclude=()):
+    """Returns the current project rows: the latest version of every ProjectID across all parts.
+
+    columns and exclude select the returned columns; the row order does not depend on them.
+    """
+    manifest = _read_manifest(dataset_dir)
+    id_map = pd.read_parquet(_path(dataset_dir, 'project_ids.parquet'))
+    latest_part = id_map.set_index('ProjectID')['part']
+    # ProjectID decides which rows are live, so it is always read
+    drop_id = columns is not None and 'ProjectID' not in columns
+    if drop_id:
+        columns = ['ProjectID'] + list(columns)
+
+    frames = []
+    for entry in manifest['extracts']:
+        rows = read_columns(_path(dataset_dir, f"part-{entry['part']:05d}.parquet"), columns, exclude)
+        live = rows['ProjectID'].isna() | (rows['ProjectID'].map(latest_part) == entry['part'])
+        frames.append(rows[live])
+    df = pd.concat(frames, ignore_index=True)
+    # Parts encode their own categories, which concat falls back to object for
+    for col in CATEGORY_COLUMNS:
+        if col in df and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df.drop(columns='ProjectID') if drop_id else df
+
+
+def load_dataset_rollup(dataset_dir=DATASET_DIR):
+    """Returns the incrementally maintained rollup cube of the dataset."""
+    return pd.read_parquet(_path(dataset_dir, 'rollup.parquet'))
+
+
+def load_dataset_baseline(dataset_dir=DATASET_DIR):
+    """Returns the incrementally maintained anomaly baseline of the dataset."""
+    return pd.read_parquet(_path(dataset_dir, 'baseline.parquet'))
+
+
+def load_project_frame(sources=None, columns=None, exclude=()):
+    """Loads the cleaned project data for the given sources from the fastest up-to-date store.
+
+    A single extract is served from its snapshot (streamed when large); extra extract drops
+    are merged into the append-only dataset first. Frames loaded with different columns
+    share the same row order, so lazily loaded columns line up by position.
+    """
+    sources = sources or project_sources()
+    if len(sources) > 1:
+        sync_dataset(sources)
+        return load_dataset(columns=columns, exclude=exclude)
+    file_path = sources[0]
+    if os.path.getsize(file_path) > STREAMING_THRESHOLD_BYTES:
+        return load_snapshot(
+            'project_data', file_path, write_project_parquet, CLEANING_VERSION, streaming=True,
+            columns=columns, exclude=exclude,
+        )
+    return load_snapshot('project_data', file_path, build_project_data, CLEANING_VERSION, columns=columns, exclude=exclude)
+
+
+def load_project_rollup(df, sources=None):
+    """Returns the rollup cube of df, reusing the incrementally maintained one when extracts were appended."""
+    sources = sources or project_sources()
+    if len(sources) > 1:
+        return load_dataset_rollup()
+    return build_rollup(df)
+
+
+def load_project_baseline(df, sources=None):
+    """Returns the anomaly baseline of df, reusing the incrementally maintained one when extracts were appended."""
+    sources = sources or project_sources()
+    if len(sources) > 1:
+        return load_dataset_baseline()
+    return build_baseline(df)
@@ -0,0 +1,133 @@
+"""Global project filters and a memory-bounded LRU cache of the filtered views they select.
+
+The cache is shared by every session, so a filter computed once serves every page and user
+until it is evicted. Its budget is set with KILATIS_FILTER_CACHE_MB (default 256).
+"""
+import math
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+CACHE_BUDGET_BYTES = int(float(os.environ.get('KILATIS_FILTER_CACHE_MB', 256)) * 1024 * 1024)
+
+# Contract cost bands in pesos, as [low, high)
+COST_BANDS = {
+    'Under ₱10M': (0, 10e6),
+    '₱10M–₱50M': (10e6, 50e6),
+    '₱50M–₱100M': (50e6, 100e6),
+    '₱100M and above': (100e6, math.inf),
+}
+
+# Normalized filter: the start year range (or None) and sorted tuples of the selected values, empty meaning all
+ProjectFilter = namedtuple('ProjectFilter', ['years', 'regions', 'terms', 'cost_bands'])
+NO_FILTER = ProjectFilter(None, (), (), ())
+
+
+def _selection(selected, available):
+    selected = sorted(set(selected or ()))
+    # Selecting every value is the same as no restriction, and shares its cache entries
+    return () if available is not None and set(selected) >= set(available) else tuple(selected)
+
+
+def normalize_filter(years=None, regions=(), terms=(), cost_bands=(), year_bounds=None, all_regions=None, all_terms=None):
+    """Returns the canonical ProjectFilter for a selection, so equal selections share one cache key."""
+    if years is not None:
+        years = (int(min(years)), int(max(years)))
+        if year_bounds is not None and years[0] <= year_bounds[0] and years[1] >= year_bounds[1]:
+            years = None
+    return ProjectFilter(
+        years, _selection(regions, all_regions), _selection(terms, all_terms), _selection(cost_bands, COST_BANDS)
+    )
+
+
+def filter_mask(df, spec):
+    """Boolean mask of the rows of the project frame selected by a ProjectFilter."""
+    mask = np.ones(len(df), dtype=bool)
+    if spec.years is not None:
+        mask &= df['StartDate'].dt.year.between(*spec.years).to_numpy()
+    if spec.regions:
+        mask &= df['Region_std'].isin(spec.regions).to_numpy()
+    if spec.terms:
+        mask &= df['PresTerm'].isin(spec.terms).to_numpy()
+    if spec.cost_bands:
+        cost = df['ContractCost'].to_numpy()
+        in_band = np.zeros(len(df), dtype=bool)
+        for band in spec.cost_bands:
+            low, high = COST_BANDS[band]
+            in_band |= (cost >= low) & (cost < high)
+        mask &= in_band
+    return mask
+
+
+def describe_filter(spec):
+    """Short human-readable summary of an active filter."""
+    parts = []
+    if spec.years is not None:
+        parts.append(f"{spec.years[0]}–{spec.years[1]}")
+    for values in (spec.regions, spec.terms, spec.cost_bands):
+        if values:
+            parts.append(', '.join(values))
+    return '; '.join(parts)
+
+
+def nbytes(value):
+    """Approximate memory held by a cached value.
+
+    Object columns count their references only, as the strings are shared with the unfiltered frame.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        return sum(nbytes(item) for item in value)
+    return 0
+
+
+class ViewCache:
+    """Thread-safe LRU cache evicting the least recently used entries beyond a memory budget.
+
+    An entry larger than the whole budget is returned but not kept.
+    """
+
+    def __init__(self, max_bytes=CACHE_BUDGET_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, build):
+        """Returns the cached value of key, building it with build() on a miss. Also returns whether it was a hit."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0], True
+            self.misses += 1
+
+        # Built outside the lock, so a slow view does not block other sessions; a concurrent
+        # build of the same key only costs duplicate work
+        value = build()
+        size = nbytes(value)
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = (value, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, (_, evicted_size) = self._entries.popitem(last=False)
+                    self.bytes -= evicted_size
+        return value, False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
@@ -0,0 +1,117 @@
+import json
+import os
+import re
+
+import numpy as np
+
+GEOJSON_PATH = 'data/philippines_regions.geojson'
+GEOJSON_URL = "https://raw.githubusercontent.com/faeldon/philippines-json-maps/master/geojson/regions.json"
+GEOJSON_CACHE_PATH = '.cache/regions.geojson'
+FEATURE_PROPERTY = 'REGION'
+
+# Douglas-Peucker tolerances in degrees, with the coordinate precision each level needs
+SIMPLIFY_LEVELS = {
+    'High': (0.001, 4),
+    'Medium': (0.01, 3),
+    'Low': (0.05, 2),
+}
+
+# Region names used by some boundary files that differ from the project data
+REGION_ALIASES = {
+    'ARMM': 'BARMM',
+    'METROPOLITAN MANILA': 'NCR',
+    'METRO MANILA': 'NCR',
+    'MIMAROPA': 'REGION IV-B',
+    'CALABARZON': 'REGION IV-A',
+}
+
+
+def read_geojson(path=GEOJSON_PATH):
+    """Reads the bundled GeoJSON, falling back to a one-time download cached under .cache/."""
+    for candidate in (path, GEOJSON_CACHE_PATH):
+        try:
+            with open(candidate) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            continue
+
+    import requests
+    response = requests.get(GEOJSON_URL, timeout=10)
+    response.raise_for_status()
+    geojson = response.json()
+    os.makedirs(os.path.dirname(GEOJSON_CACHE_PATH), exist_ok=True)
+    with open(GEOJSON_CACHE_PATH, 'w') as f:
+        json.dump(geojson, f)
+    return geojson
+
+
+def _simplify_ring(points, tolerance):
+    """Douglas-Peucker simplification of one closed ring, keeping its first and last points."""
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        length = np.hypot(*segment)
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.extend([(start, split), (split, end)])
+    return points[keep]
+
+
+def _simplify_polygon(polygon, tolerance, decimals):
+    rings = []
+    for ring in polygon:
+        simplified = np.round(_simplify_ring(np.asarray(ring, dtype=float), tolerance), decimals)
+        if len(simplified) >= 4:
+            rings.append(simplified.tolist())
+        elif not rings:
+            return None  # Exterior ring collapsed, drop the whole polygon
+    return rings
+
+
+def simplify_geojson(geojson, tolerance, decimals):
+    """Returns a copy of a Polygon/MultiPolygon FeatureCollection with simplified, rounded coordinates."""
+    features = []
+    for feature in geojson['features']:
+        geometry = feature['geometry']
+        polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+        simplified = [p for p in (_simplify_polygon(p, tolerance, decimals) for p in polygons) if p]
+        if not simplified:
+            simplified = polygons  # Never drop a whole region
+        features.append({
+            'type': 'Feature',
+            'properties': feature['properties'],
+            'geometry': {'type': 'MultiPolygon', 'coordinates': simplified},
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def region_key(name):
+    """Reduces a region name to a short comparable key such as 'REGION IV-A', 'NCR' or 'BARMM'."""
+    name = str(name).upper().strip()
+    abbreviation = re.search(r'\(([^)]+)\)\s*$', name)
+    base = re.sub(r'\s*\([^)]*\)\s*$', '', name)
+    if re.match(r'REGION [IVX]+(-[AB])?$', base):
+        return base
+    key = abbreviation.group(1) if abbreviation else base
+    return REGION_ALIASES.get(key, key)
+
+
+def match_regions(region_names, geojson, feature_property=FEATURE_PROPERTY):
+    """Maps each region name from the project data to the matching GeoJSON feature property value."""
+    feature_keys = {}
+    for feature in geojson['features']:
+        value = feature['properties'].get(feature_property)
+        feature_keys.setdefault(region_key(value), value)
+    return {name: feature_keys.get(region_key(name)) for name in region_names}
@@ -0,0 +1,122 @@
+"""Opt-in timing of loaders and page sections.
+
+Enable with KILATIS_DIAGNOSTICS=1. Spans are collected per script run, shown in the sidebar
+diagnostics panel and appended as JSON lines to KILATIS_DIAGNOSTICS_LOG.
+"""
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+ENABLED = os.environ.get('KILATIS_DIAGNOSTICS', '') not in ('', '0', 'false')
+LOG_PATH = os.environ.get('KILATIS_DIAGNOSTICS_LOG', '.cache/diagnostics.jsonl')
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+_state = threading.local()
+_log_lock = threading.Lock()
+
+
+def _rss_mb():
+    """Current resident set size of the process in MB, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 1e6
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _spans():
+    if not hasattr(_state, 'spans'):
+        _state.spans, _state.stack, _state.run = [], [], {}
+    return _state.spans
+
+
+def start_run(page):
+    """Starts a new collection of spans for one script run of the given page."""
+    _spans()
+    _state.spans, _state.stack = [], []
+    _state.run = {'run_id': uuid.uuid4().hex[:12], 'page': page, 'pid': os.getpid()}
+
+
+def run_spans():
+    """Returns the spans recorded so far in the current script run."""
+    return list(_spans())
+
+
+@contextmanager
+def timed(name, rows=None):
+    """Records wall time and memory delta of the enclosed block as a span.
+
+    The yielded span dict can be updated, e.g. span['rows'] = len(df).
+    """
+    if not ENABLED:
+        yield {}
+        return
+    spans = _spans()
+    span = {'name': name, 'depth': len(_state.stack), 'cache': None, 'rows': rows}
+    _state.stack.append(span)
+    spans.append(span)
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    try:
+        yield span
+    finally:
+        span['seconds'] = round(time.perf_counter() - start, 4)
+        rss_after = _rss_mb()
+        span['rss_delta_mb'] = round(rss_after - rss_before, 1) if rss_before is not None and rss_after is not None else None
+        _state.stack.pop()
+
+
+def _rows_of(result):
+    if isinstance(result, tuple):
+        result = result[0]
+    return len(result) if hasattr(result, '__len__') and not isinstance(result, (str, dict)) else None
+
+
+def instrumented(cache_decorator=None, name=None):
+    """Decorates a loader with a span, applying cache_decorator (e.g. st.cache_data) inside it.
+
+    The span reports 'miss' when the cached body ran and 'hit' when the cache answered.
+    """
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def body(*args, **kwargs):
+            if ENABLED and _state.stack:
+                _state.stack[-1]['cache'] = 'miss'
+            return fn(*args, **kwargs)
+
+        cached = cache_decorator(body) if cache_decorator else body
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return cached(*args, **kwargs)
+            with timed(span_name) as span:
+                if cache_decorator:
+                    span['cache'] = 'hit'
+                result = cached(*args, **kwargs)
+                span['rows'] = _rows_of(result)
+            return result
+
+        # Keep the cache's own helpers (e.g. .clear()) reachable
+        wrapper.clear = getattr(cached, 'clear', None)
+        return wrapper
+    return decorator
+
+
+def flush_run():
+    """Appends the spans of the current run to the JSON-lines log and returns them."""
+    spans = run_spans()
+    if not ENABLED or not spans:
+        return spans
+    record_base = dict(_state.run, timestamp=time.time())
+    os.makedirs(os.path.dirname(LOG_PATH) or '.', exist_ok=True)
+    with _log_lock, open(LOG_PATH, 'a') as f:
+        for span in spans:
+            f.write(json.dumps(dict(record_base, **span)) + '\n')
+    return spans
@@ -0,0 +1,206 @@
+"""Contractor co-location network: which contractors keep winning work from the same office in the same period.
+
+Projects are reduced to a sparse contractor x (office, time window) incidence matrix A in
+COO form. The co-occurrence graph is A·Aᵀ, computed group by group with vectorized pair
+expansion instead of a dense product or Python loops over contractor pairs. Links are kept
+when two contractors share enough groups relative to their activity (Jaccard), connected
+components of the links are the clusters, and clusters are ranked by red-flag indices.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from scorecard import LOW_UNDERRUN_THRESHOLD
+
+# Grouping columns a network can be built over, as offered on the page
+GROUP_COLUMNS = {'Implementing Office': 'ImplementingOffice', 'Province': 'Province'}
+
+WINDOW_YEARS = 2
+MIN_SHARED_GROUPS = 2
+MIN_JACCARD = 0.2
+
+# Groups with more contractors than this say little about any pair and would add O(k²) pairs
+MAX_GROUP_CONTRACTORS = 200
+
+# Upper bound on contractor pairs expanded at once, bounding peak memory
+PAIR_BATCH = 5_000_000
+
+ContractorNetwork = namedtuple('ContractorNetwork', ['clusters', 'members', 'edges'])
+
+
+def build_incidence(df, group_col='ImplementingOffice', window_years=WINDOW_YEARS):
+    """Returns the non-zero entries of the contractor x (group, window) incidence matrix.
+
+    Result: (contractor codes, group codes, contractor names, number of groups, group -> group_col code).
+    Rows with a missing contractor, group or start date are left out.
+    """
+    contractor, names = pd.factorize(df['Contractor'], sort=True)
+    place, _ = pd.factorize(df[group_col], sort=True)
+    year = df['StartDate'].dt.year.to_numpy(dtype=float, na_value=np.nan)
+    valid = (contractor >= 0) & (place >= 0) & ~np.isnan(year)
+    window = np.where(valid, year, 0).astype(np.int64) // window_years
+
+    window = window - window[valid].min() if valid.any() else window
+    n_windows = int(window[valid].max()) + 1 if valid.any() else 1
+    group, group_keys = pd.factorize(place[valid].astype(np.int64) * n_windows + window[valid], sort=True)
+    return contractor[valid], group, names.astype(object), len(group_keys), (group_keys // n_windows).astype(np.int64)
+
+
+def _pairs(members, offsets):
+    """Expands every unordered pair of positions within each [offsets[k], offsets[k + 1]) block."""
+    sizes = np.diff(offsets)
+    starts = np.repeat(offsets[:-1], sizes)
+    rank = np.arange(len(starts)) - starts + offsets[0]
+    # Each element pairs with the elements after it in its block
+    partners = np.repeat(sizes, sizes) - 1 - rank
+    left = np.repeat(np.arange(offsets[0], offsets[-1]), partners)
+    block_start = np.repeat(np.cumsum(partners) - partners, partners)
+    right = left + 1 + (np.arange(len(left)) - block_start)
+    return members[left], members[right]
+
+
+def co_occurrence(contractor, group, n_contractors, n_groups, max_group_size=MAX_GROUP_CONTRACTORS):
+    """Returns (source, target, shared groups) of A·Aᵀ above the diagonal, for a binary incidence matrix A."""
+    # Unique (contractor, group) entries, ordered by group
+    entries = np.unique(group.astype(np.int64) * n_contractors + contractor)
+    member, entry_group = entries % n_contractors, entries // n_contractors
+    sizes = np.bincount(entry_group, minlength=n_groups)
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    groups = np.flatnonzero((sizes >= 2) & (sizes <= max_group_size))
+
+    pair_counts = sizes[groups] * (sizes[groups] - 1) // 2
+    batches = np.searchsorted(np.cumsum(pair_counts), np.arange(PAIR_BATCH, pair_counts.sum() + PAIR_BATCH, PAIR_BATCH))
+    keys, counts = [], []
+    for batch in np.split(groups, np.unique(np.minimum(batches, len(groups)))[:-1] + 1 if len(groups) else []):
+        if not len(batch):
+            continue
+        block_offsets = np.concatenate([offsets[batch], [offsets[batch[-1] + 1]]])
+        # Non-consecutive groups are expanded one contiguous run at a time
+        runs = np.flatnonzero(np.diff(batch) != 1) + 1
+        for run in np.split(np.arange(len(batch)), runs):
+            run_offsets = np.append(block_offsets[run], offsets[batch[run[-1]] + 1])
+            source, target = _pairs(member, run_offsets)
+            pair_keys = np.minimum(source, target).astype(np.int64) * n_contractors + np.maximum(source, target)
+            unique_keys, unique_counts = np.unique(pair_keys, return_counts=True)
+            keys.append(unique_keys)
+            counts.append(unique_counts)
+    if not keys:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, empty
+
+    keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+    shared = np.bincount(inverse, weights=np.concatenate(counts)).astype(np.int64)
+    return keys // n_contractors, keys % n_contractors, shared
+
+
+def connected_components(n_nodes, source, target):
+    """Labels each node with the smallest node id of its connected component.
+
+    Vectorized min-label propagation with pointer jumping; converges in O(log diameter) rounds in practice.
+    """
+    labels = np.arange(n_nodes)
+    while True:
+        low = np.minimum(labels[source], labels[target])
+        updated = labels.copy()
+        np.minimum.at(updated, source, low)
+        np.minimum.at(updated, target, low)
+        # Pointer jumping: follow labels to their own labels until they settle
+        while True:
+            jumped = updated[updated]
+            if np.array_equal(jumped, updated):
+                break
+            updated = jumped
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def _percentile(values):
+    return pd.Series(values).rank(pct=True).fillna(0).to_numpy()
+
+
+def build_network(df, group_col='ImplementingOffice', window_years=WINDOW_YEARS, min_shared=MIN_SHARED_GROUPS,
+                  min_jaccard=MIN_JACCARD):
+    """Builds the contractor co-location network of a project frame and ranks its clusters.
+
+    Two contractors are linked when they won projects from the same group_col in the same
+    window_years-long period at least min_shared times, and these shared groups are at least
+    min_jaccard of the groups either of them is active in.
+    """
+    contractor, group, names, n_groups, group_place = build_incidence(df, group_col, window_years)
+    n = len(names)
+    valid = df['Contractor'].notna() & df[group_col].notna() & df['StartDate'].notna()
+    cost = df.loc[valid, 'ContractCost'].to_numpy(dtype=float)
+    low_underrun = (df.loc[valid, 'CostUnderrunPct'].to_numpy(dtype=float) < LOW_UNDERRUN_THRESHOLD)
+
+    source, target, shared = co_occurrence(contractor, group, n, n_groups)
+    active_groups = np.bincount(np.unique(group.astype(np.int64) * n + contractor) % n, minlength=n)
+    jaccard = shared / np.maximum(active_groups[source] + active_groups[target] - shared, 1)
+    linked = (shared >= min_shared) & (jaccard >= min_jaccard)
+    source, target, shared, jaccard = source[linked], target[linked], shared[linked], jaccard[linked]
+
+    component = connected_components(n, source, target)
+    component_size = np.bincount(component, minlength=n)
+    in_cluster = component_size[component] >= 2
+
+    # Per-contractor totals
+    projects = np.bincount(contractor, minlength=n)
+    value = np.bincount(contractor, weights=cost, minlength=n)
+    degree = np.bincount(source, minlength=n) + np.bincount(target, minlength=n)
+    weighted_degree = np.bincount(source, weights=shared, minlength=n) + np.bincount(target, weights=shared, minlength=n)
+
+    members = pd.DataFrame({
+        'Contractor': names, 'Component': component, 'Links': degree, 'Shared_Groups': weighted_degree.astype(np.int64),
+        'Projects': projects, 'Contract_Value': value,
+    })[in_cluster]
+
+    # Per-cluster indices, all as group-bys over contractors, rows, links and incidence entries
+    row_component = component[contractor]
+    row_in_cluster = in_cluster[contractor]
+    by_rows = pd.DataFrame({
+        'Component': row_component[row_in_cluster], 'LowUnderrun': low_underrun[row_in_cluster],
+    }).groupby('Component')['LowUnderrun'].mean()
+    by_links = pd.DataFrame({'Component': component[source], 'Jaccard': jaccard}).groupby('Component').agg(
+        Links=('Jaccard', 'size'), Avg_Jaccard=('Jaccard', 'mean'),
+    )
+
+    group_value = np.bincount(group, weights=cost, minlength=n_groups)
+    cluster_groups = pd.DataFrame({
+        'Component': row_component[row_in_cluster], 'Group': group[row_in_cluster], 'Value': cost[row_in_cluster],
+    }).groupby(['Component', 'Group'])['Value'].sum().reset_index()
+    cluster_groups['GroupValue'] = group_value[cluster_groups['Group'].to_numpy()]
+    cluster_groups['Place'] = group_place[cluster_groups['Group'].to_numpy()]
+    by_groups = cluster_groups.groupby('Component').agg(
+        Value=('Value', 'sum'), GroupValue=('GroupValue', 'sum'), Places=('Place', 'nunique'),
+    )
+
+    share = members['Contract_Value'] / members.groupby('Component')['Contract_Value'].transform('sum')
+    clusters = members.assign(Share2=(share * 100) ** 2).groupby('Component').agg(
+        Contractors=('Contractor', 'size'), Projects=('Projects', 'sum'), Total_Contract_Value=('Contract_Value', 'sum'),
+        Member_HHI=('Share2', 'sum'),
+    )
+    lead = members.sort_values('Contract_Value', ascending=False).drop_duplicates('Component').set_index('Component')
+    clusters['Lead_Contractor'] = lead['Contractor']
+    clusters = clusters.join(by_links).join(by_groups[['Places']])
+    clusters['Density'] = 2 * clusters['Links'] / (clusters['Contractors'] * (clusters['Contractors'] - 1))
+    clusters['Local_Capture_Pct'] = by_groups['Value'] / by_groups['GroupValue'].where(by_groups['GroupValue'] > 0) * 100
+    clusters['Low_Underrun_Pct'] = by_rows * 100
+
+    # Red-flag score: mean percentile rank of how tightly knit the cluster is, how much of its
+    # local market it captures and how often it bids at (almost) the full budget
+    flags = ['Density', 'Avg_Jaccard', 'Local_Capture_Pct', 'Low_Underrun_Pct']
+    clusters['Score'] = np.mean([_percentile(clusters[flag]) for flag in flags], axis=0) * 100
+    clusters = clusters.sort_values(['Score', 'Total_Contract_Value'], ascending=False)
+    cluster_ids = pd.Series(np.arange(1, len(clusters) + 1), index=clusters.index)
+
+    clusters = clusters.reset_index(drop=True).rename_axis(None)
+    clusters.insert(0, 'Cluster', np.arange(1, len(clusters) + 1))
+    clusters = clusters.rename(columns={'Places': f'{group_col}s'})
+    members = members.assign(Cluster=members['Component'].map(cluster_ids)).drop(columns='Component')
+    members = members.sort_values(['Cluster', 'Contract_Value'], ascending=[True, False]).reset_index(drop=True)
+    edges = pd.DataFrame({
+        'Source': names[source], 'Target': names[target], 'Cluster': cluster_ids.reindex(component[source]).to_numpy(),
+        'Shared_Groups': shared, 'Jaccard': jaccard,
+    }).sort_values(['Cluster', 'Shared_Groups'], ascending=[True, False]).reset_index(drop=True)
+    return ContractorNetwork(clusters, members, edges)
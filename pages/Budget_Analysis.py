@@ -1,35 +1,32 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+from instrumentation import start_run
+from analytics import top_agencies, yearly_budget
+from utils import (
+    filter_sidebar, load_agency_budgets, load_budget_summary, load_nep_gaa, plotly_chart, precomputed, render_diagnostics,
+)
 
 # --- Page Configuration ---
 st.set_page_config(layout="wide")
+start_run("Budget Analysis")
 st.title(" National Budget Analysis")
 st.markdown("This page analyzes the DPWH budget over time, with a focus on flood management and comparisons to the national budget.")
-
-# --- Helper function to clean currency strings ---
-def clean_currency(series):
-    # This function takes a whole column (pandas Series)
-    # Replaces non-string values with empty strings, then cleans and converts to numeric
-    return pd.to_numeric(series.astype(str).str.replace(',', ''), errors='coerce')
+filters = filter_sidebar()
 
 # --- Section 1: DPWH Budget Over Time ---
 st.header("DPWH Budget Trend (2011-2025)")
 try:
-    # This part is generally stable
-    df_summary = pd.read_excel(
-        "data/DPWH_budget_consolidated.xlsx",
-        sheet_name="WIP - DPWH Budget Summary 2011-"
-    )
-    df_summary['AMOUNT'] = clean_currency(df_summary['AMOUNT'])
-    yearly_budget = df_summary.groupby('FISCAL YEAR')['AMOUNT'].sum().reset_index()
+    df_yearly = precomputed('yearly_budget', lambda: yearly_budget(load_budget_summary()))
+    # Of the global filters, only the year range applies to budget data
+    if filters.years is not None:
+        df_yearly = df_yearly[df_yearly['FISCAL YEAR'].between(*filters.years)]
 
     fig_yearly = px.line(
-        yearly_budget, x='FISCAL YEAR', y='AMOUNT',
+        df_yearly, x='FISCAL YEAR', y='AMOUNT',
         title="Total DPWH Budget per Year (GAA)", markers=True, template='plotly_white'
     )
     fig_yearly.update_layout(yaxis_title="Budget (in PHP Billions)", yaxis_tickformat=",.0s", xaxis_title="Fiscal Year")
-    st.plotly_chart(fig_yearly, use_container_width=True)
+    plotly_chart(fig_yearly, use_container_width=True)
 
 except Exception as e:
     st.error(f"""
@@ -44,20 +41,7 @@ st.markdown("---")
 # --- Section 2: Proposed (NEP) vs. Approved (GAA) Budget ---
 st.header("2025 Proposed (NEP) vs. Approved (GAA) Budget")
 try:
-    # More robust loading with explicit column naming
-    df_nep_gaa = pd.read_excel(
-        "data/NEP v GAA Comparison.xlsx",
-        sheet_name="Sheet1",
-        header=0
-    )
-    df_nep_gaa.columns = ['Program', 'NEP', 'GAA', 'Variance']
-    df_nep_gaa['Program'] = df_nep_gaa['Program'].astype(str)
-    df_dpwh_nep_gaa = df_nep_gaa[df_nep_gaa['Program'].str.contains('DPWH', na=False)].copy()
-
-    for col in ['NEP', 'GAA', 'Variance']:
-        df_dpwh_nep_gaa[col] = clean_currency(df_dpwh_nep_gaa[col])
-
-    df_dpwh_nep_gaa['Program'] = df_dpwh_nep_gaa['Program'].str.replace('-', '').str.strip()
+    df_dpwh_nep_gaa = precomputed('nep_gaa', load_nep_gaa)
 
     col1, col2 = st.columns(2)
     with col1:
@@ -65,13 +49,13 @@ try:
         df_melted = df_dpwh_nep_gaa.melt(id_vars='Program', value_vars=['NEP', 'GAA'], var_name='BudgetType', value_name='Amount')
         fig_nep_gaa = px.bar(df_melted, x='Amount', y='Program', color='BudgetType', barmode='group', orientation='h', template='plotly_white', title="2025 Proposed vs. Approved Budget")
         fig_nep_gaa.update_layout(xaxis_title="Budget (in PHP)", yaxis_title=None, yaxis={'categoryorder': 'total ascending'})
-        st.plotly_chart(fig_nep_gaa, use_container_width=True)
+        plotly_chart(fig_nep_gaa, use_container_width=True)
 
     with col2:
         st.subheader("Variance Analysis (GAA minus NEP)")
         fig_variance = px.bar(df_dpwh_nep_gaa, x='Variance', y='Program', orientation='h', color='Variance', color_continuous_scale='RdBu', template='plotly_white', title="Budget Changes During Legislation")
         fig_variance.update_layout(xaxis_title="Change in Budget (PHP)", yaxis_title=None, yaxis={'categoryorder': 'total ascending'})
-        st.plotly_chart(fig_variance, use_container_width=True)
+        plotly_chart(fig_variance, use_container_width=True)
 
 except Exception as e:
     st.error(f"""
@@ -85,41 +69,15 @@ st.markdown("---")
 # --- Section 3: DPWH Budget vs. Other Departments ---
 st.header("DPWH vs. Other National Agencies (2025 GAA)")
 try:
-    # This is the most robust way to read this specific messy sheet
-    df_nga_raw = pd.read_excel(
-        "data/NGAs Budget per FY.xlsx",
-        sheet_name="TOTAL GAA per Agency",
-        header=None
-    )
+    top_10_agencies = precomputed('top_agencies', lambda: top_agencies(load_agency_budgets()))
 
-    header_row_index = None
-    for i, row in df_nga_raw.iterrows():
-        if 'AGENCY NAME' in str(row.values):
-            header_row_index = i
-            break
-
-    if header_row_index is not None:
-        df_nga = df_nga_raw.iloc[header_row_index:].reset_index(drop=True)
-        # Set the found row as header, and convert headers to string to be safe
-        df_nga.columns = df_nga.iloc[0].astype(str)
-        df_nga = df_nga.drop(0).reset_index(drop=True)
-
-        # Select the 'AGENCY NAME' and the '2025' column (as a string)
-        df_2025_nga = df_nga[['AGENCY NAME', '2025']].dropna().copy()
-        df_2025_nga.columns = ['Agency', 'Budget']
-
-        df_2025_nga['Budget'] = clean_currency(df_2025_nga['Budget']) * 1000
-        top_10_agencies = df_2025_nga.nlargest(10, 'Budget')
-
-        st.subheader("Top 10 Government Agencies by Budget")
-        fig_top_agencies = px.bar(
-            top_10_agencies, x='Budget', y='Agency', orientation='h',
-            title='2025 Approved Budget for Top 10 Agencies', template='plotly_white'
-        )
-        fig_top_agencies.update_layout(xaxis_title="Budget (in PHP Billions)", yaxis_title=None, xaxis_tickformat=",.0s", yaxis={'categoryorder': 'total ascending'})
-        st.plotly_chart(fig_top_agencies, use_container_width=True)
-    else:
-        st.error("Could not automatically find the header row ('AGENCY NAME') in the 'TOTAL GAA per Agency' sheet.")
+    st.subheader("Top 10 Government Agencies by Budget")
+    fig_top_agencies = px.bar(
+        top_10_agencies, x='Budget', y='Agency', orientation='h',
+        title='2025 Approved Budget for Top 10 Agencies', template='plotly_white'
+    )
+    fig_top_agencies.update_layout(xaxis_title="Budget (in PHP Billions)", yaxis_title=None, xaxis_tickformat=",.0s", yaxis={'categoryorder': 'total ascending'})
+    plotly_chart(fig_top_agencies, use_container_width=True)
 
 except Exception as e:
     st.error(f"""
@@ -128,3 +86,5 @@ except Exception as e:
     - Make sure it contains a sheet named `TOTAL GAA per Agency`.
     - Error details: {e}
     """)
+
+render_diagnostics()
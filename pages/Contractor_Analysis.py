@@ -1,41 +1,69 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from utils import load_project_data
+from analytics import contractor_summary, top_contractors
+from instrumentation import start_run, timed
+from utils import (
+    filter_sidebar, load_contractor_index, load_project_data, load_project_store, load_rollup, paginated_dataframe,
+    paginated_query, plotly_chart, precomputed, render_diagnostics, search_select, with_descriptions,
+)
 
 st.set_page_config(layout="wide")
+start_run("Contractor Analysis")
 st.title("Contractor Performance Analysis")
 
-df = load_project_data()
+filters = filter_sidebar()
+df = load_project_data(filters)
+cube = load_rollup(filters)
+store = load_project_store()
 
 if df is not None:
+    contractors = precomputed('contractor_summary', contractor_summary, cube, filters=filters)
+
     col1, col2 = st.columns(2)
-    with col1:
+    with col1, timed("Top 15 Contractors by Project Count"):
         st.subheader("Top 15 Contractors by Project Count")
-        contractor_counts = df['Contractor'].value_counts().nlargest(15).reset_index()
+        contractor_counts = top_contractors(contractors, 'Projects').rename(columns={'Projects': 'count'})
         fig = px.bar(contractor_counts, x='count', y='Contractor', orientation='h', template='plotly_white', title="Number of Projects Awarded")
         fig.update_layout(yaxis={'categoryorder':'total ascending'})
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
     
-    with col2:
+    with col2, timed("Top 15 Contractors by Total Contract Value"):
         st.subheader("Top 15 Contractors by Total Contract Value")
-        contractor_value = df.groupby('Contractor')['ContractCost'].sum().nlargest(15).reset_index()
+        contractor_value = top_contractors(contractors, 'ContractCost')
         fig2 = px.bar(contractor_value, x='ContractCost', y='Contractor', orientation='h', template='plotly_white', title="Total Value of Contracts (PHP)")
         fig2.update_layout(yaxis={'categoryorder':'total ascending'})
-        st.plotly_chart(fig2, use_container_width=True)
+        plotly_chart(fig2, use_container_width=True)
 
     st.markdown("---")
     
     st.subheader("Deep Dive into a Specific Contractor")
-    all_contractors = sorted(df['Contractor'].unique())
-    selected_contractor = st.selectbox("Select a Contractor", options=all_contractors)
+    selected_contractor = search_select("Select a Contractor", contractors['Contractor'], key="contractor")
 
     if selected_contractor:
-        contractor_df = df[df['Contractor'] == selected_contractor]
-        avg_delay = contractor_df[contractor_df['ProjectDelay'] > 0]['ProjectDelay'].mean()
-        
-        c1, c2, c3 = st.columns(3)
-        c1.metric("Total Projects", f"{contractor_df.shape[0]}")
-        c2.metric("Total Contract Value", f"₱{(contractor_df['ContractCost'].sum()/1e6):.2f}M")
-        c3.metric("Average Project Delay", f"{avg_delay:.0f} days" if not pd.isna(avg_delay) else "No Delays")
-        st.dataframe(contractor_df[['ProjectDescription', 'Region', 'ContractCost', 'ProjectDelay']].sort_values(by='ProjectDelay', ascending=False))
+        with timed("Contractor Deep Dive") as span:
+            contractor_totals = contractors[contractors['Contractor'] == selected_contractor].iloc[0]
+            avg_delay = contractor_totals['AverageDelay']
+            
+            c1, c2, c3 = st.columns(3)
+            c1.metric("Total Projects", f"{int(contractor_totals['Projects'])}")
+            c2.metric("Total Contract Value", f"₱{(contractor_totals['ContractCost']/1e6):.2f}M")
+            c3.metric("Average Project Delay", f"{avg_delay:.0f} days" if not pd.isna(avg_delay) else "No Delays")
+            drill_down_columns = ['ProjectDescription', 'Region', 'ContractCost', 'ProjectDelay']
+            if store is not None:
+                span['rows'] = int(contractor_totals['Projects'])
+                paginated_query(
+                    store, {'Contractor': selected_contractor}, drill_down_columns, scope=filters,
+                    key="contractor_projects_page", sort_by='ProjectDelay', ascending=False,
+                )
+            else:
+                # The index covers the unfiltered frame, whose row positions are the labels of df
+                contractor_index = load_contractor_index()
+                contractor_df = df.loc[df.index.intersection(contractor_index.rows_for(selected_contractor))]
+                span['rows'] = len(contractor_df)
+                paginated_dataframe(
+                    with_descriptions(contractor_df)[drill_down_columns],
+                    key="contractor_projects_page", sort_by='ProjectDelay', ascending=False,
+                )
+
+render_diagnostics()
@@ -1,42 +1,134 @@
+import numpy as np
+import pandas as pd
 import streamlit as st
 import plotly.express as px
-from utils import load_project_data
+import plotly.graph_objects as go
+from analytics import watchlist_summary, watchlist_treemap
+from instrumentation import start_run, timed
+from network import GROUP_COLUMNS, WINDOW_YEARS
+from utils import (
+    filter_sidebar, load_contractor_index, load_contractor_network, load_project_data, paginated_dataframe, plotly_chart,
+    precomputed, render_diagnostics, search_select,
+)
+
+# Largest cluster drawn in full; bigger ones show their top contractors by value
+MAX_GRAPH_NODES = 60
 
 st.set_page_config(layout="wide")
+start_run("Investigative Insights")
 st.title(" Investigative Insights & Contractor Networks")
 st.markdown("This page connects project data to findings from the policy note on contract concentration.")
 
-df = load_project_data()
+filters = filter_sidebar()
+df = load_project_data(filters)
+contractor_index = load_contractor_index()
 
 if df is not None:
     st.info("Analysis based on the Senate Blue Ribbon Investigation and the 'Sumbong sa Pangulo' portal.")
 
-    contractors_of_interest = [
-        'LEGACY CONSTRUCTION', 'AL-JANA CONSTRUCTION', 'L.L.M. CONSTRUCTION',
-        'R.D. INTERIOR JUNIOR CONSTRUCTION', 'ST. GERRARD CONSTRUCTION', 
-        'IBAYO CONSTRUCTION', 'A.M.S. GONZALES', 'B.M.D. CONSTRUCTION', 'R.D. DISCAYA'
-    ]
-    
-    interest_df = df[df['Contractor'].str.contains('|'.join(contractors_of_interest), case=False, na=False)]
+    with timed("Watchlist Match") as span:
+        summary_df = precomputed('watchlist_summary', watchlist_summary, df, contractor_index, filters=filters)
+        span['rows'] = len(summary_df)
 
     st.subheader("Visualizing Contract Concentration")
     st.markdown("The treemap below illustrates the distribution of contract values among key contractors identified in the policy note and related inquiries.")
-    treemap_data = interest_df.groupby('Contractor')['ContractCost'].sum().reset_index()
+    treemap_data = watchlist_treemap(summary_df)
 
     fig = px.treemap(treemap_data, path=[px.Constant("All Contractors"), 'Contractor'], values='ContractCost', color='ContractCost', color_continuous_scale='Reds', title='Distribution of Total Contract Value Among Key Contractors')
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
 
     col1, col2 = st.columns([2,1])
-    with col1:
+    with col1, timed("Summary for Identified Contractors"):
         st.subheader("Summary for Identified Contractors")
-        summary_df = interest_df.groupby('Contractor').agg(
-            Total_Contract_Value=('ContractCost', 'sum'),
-            Number_of_Projects=('Contractor', 'count')
-        ).sort_values(by='Total_Contract_Value', ascending=False)
-        st.dataframe(summary_df.style.format({'Total_Contract_Value': '₱{:,.2f}'}))
+        st.dataframe(summary_df.set_index('Contractor').style.format({'Total_Contract_Value': '₱{:,.2f}'}))
     with col2:
         st.subheader("Policy Note Conclusion")
         st.warning("The analysis reveals...a high concentration of contracts among a network of interconnected firms...underscoring the necessity for continued oversight.")
     
+    st.subheader("Contractor Networks")
+    link_label = st.selectbox("Link contractors that win projects from the same:", list(GROUP_COLUMNS))
+    group_col = GROUP_COLUMNS[link_label]
+    st.markdown(
+        f"Two contractors are linked when they repeatedly win projects from the same {link_label.lower()} within "
+        f"the same {WINDOW_YEARS}-year window. Clusters of linked contractors are ranked by a red-flag score "
+        "combining how tightly knit they are, how much of their local market they capture and how often they "
+        "bid at (almost) the full approved budget."
+    )
+    with timed("Contractor Network") as span:
+        network = load_contractor_network(group_col, filters)
+        span['clusters'] = len(network.clusters)
+
+    if network.clusters.empty:
+        st.info("No contractor clusters found for the current selection.")
+    else:
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Clusters", f"{len(network.clusters):,}")
+        c2.metric("Contractors in Clusters", f"{len(network.members):,}")
+        c3.metric("Largest Cluster", f"{int(network.clusters['Contractors'].max()):,} contractors")
+
+        paginated_dataframe(
+            network.clusters, key="network_clusters", hide_index=True,
+            column_config={
+                "Total_Contract_Value": st.column_config.NumberColumn(format="₱%.0f"),
+                "Density": st.column_config.ProgressColumn(format="%.2f", min_value=0, max_value=1),
+                "Local_Capture_Pct": st.column_config.ProgressColumn(format="%.1f%%", min_value=0, max_value=100),
+                "Low_Underrun_Pct": st.column_config.ProgressColumn(format="%.1f%%", min_value=0, max_value=100),
+                "Score": st.column_config.ProgressColumn(format="%.0f", min_value=0, max_value=100),
+            },
+        )
+
+        labels = (
+            '#' + network.clusters['Cluster'].astype(str) + ': ' + network.clusters['Lead_Contractor'].astype(str)
+            + ' and ' + (network.clusters['Contractors'] - 1).astype(str) + ' others'
+        )
+        selected = search_select("Select a cluster to inspect:", labels, key=f"network_cluster_{group_col}")
+        if selected is not None:
+            cluster = int(network.clusters.loc[labels == selected, 'Cluster'].iat[0])
+            members = network.members[network.members['Cluster'] == cluster]
+            edges = network.edges[network.edges['Cluster'] == cluster]
+            shown = members.head(MAX_GRAPH_NODES)
+            edges = edges[edges['Source'].isin(shown['Contractor']) & edges['Target'].isin(shown['Contractor'])]
+
+            # Circular layout, largest contractors first
+            angle = 2 * np.pi * np.arange(len(shown)) / len(shown)
+            node = pd.Series(np.arange(len(shown)), index=shown['Contractor'])
+            ends = [node[edges[side]].to_numpy() for side in ('Source', 'Target')]
+            gaps = np.full(len(edges), np.nan)
+            edge_x = np.column_stack([np.cos(angle[ends[0]]), np.cos(angle[ends[1]]), gaps]).ravel()
+            edge_y = np.column_stack([np.sin(angle[ends[0]]), np.sin(angle[ends[1]]), gaps]).ravel()
+            fig = go.Figure([
+                go.Scatter(x=edge_x, y=edge_y, mode='lines', line=dict(width=0.6, color='#bbbbbb'), hoverinfo='skip'),
+                go.Scatter(
+                    x=np.cos(angle), y=np.sin(angle), mode='markers', text=shown['Contractor'],
+                    marker=dict(size=8 + 30 * np.sqrt(shown['Contract_Value'] / shown['Contract_Value'].max()),
+                                color=shown['Links'], colorscale='Reds', showscale=True, colorbar=dict(title='Links')),
+                    customdata=shown[['Projects', 'Contract_Value']],
+                    hovertemplate='%{text}<br>Projects: %{customdata[0]}<br>Value: ₱%{customdata[1]:,.0f}<extra></extra>',
+                ),
+            ])
+            title = f"Cluster #{cluster}" if len(shown) == len(members) else f"Cluster #{cluster}: top {len(shown)} of {len(members)} contractors"
+            fig.update_layout(
+                title=title, showlegend=False, height=550,
+                xaxis=dict(visible=False), yaxis=dict(visible=False, scaleanchor='x'),
+            )
+            plotly_chart(fig, use_container_width=True)
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("**Members**")
+                paginated_dataframe(
+                    members.drop(columns='Cluster'), key=f"network_members_{cluster}", hide_index=True,
+                    column_config={"Contract_Value": st.column_config.NumberColumn(format="₱%.0f")},
+                )
+            with col2:
+                st.markdown("**Strongest Links**")
+                paginated_dataframe(
+                    network.edges[network.edges['Cluster'] == cluster].drop(columns='Cluster'),
+                    key=f"network_edges_{cluster}", hide_index=True,
+                    column_config={"Jaccard": st.column_config.NumberColumn(format="%.2f")},
+                )
+
     st.subheader("Further Reading")
     st.markdown("- [Inquirer.net: Senate blue ribbon panel seeks lookout bulletin...](https://globalnation.inquirer.net/290127/senate-blue-ribbon-panel-seeks-lookout-bulletin-vs-contractors-dpwh-officials)")
+
+render_diagnostics()
@@ -1,30 +1,42 @@
 import streamlit as st
 import plotly.express as px
-from utils import load_project_data
+from analytics import average_delay_by_region, delay_distribution, top_delayed_projects
+from instrumentation import start_run, timed
+from utils import (
+    filter_sidebar, load_project_data, load_project_descriptions, load_rollup, plotly_chart, precomputed, render_diagnostics,
+)
 
 st.set_page_config(layout="wide")
+start_run("Project Delay Analysis")
 st.title("Project Timeline and Delay Analysis")
 
-df = load_project_data()
+filters = filter_sidebar()
+df = load_project_data(filters)
+cube = load_rollup(filters)
 
 if df is not None:
     st.subheader("Top 20 Most Delayed Projects")
-    top_delayed = df[df['ProjectDelay'] > 0].nlargest(20, 'ProjectDelay')
-    top_delayed['ProjectLabel'] = top_delayed['ProjectDescription'].str[:70] + '... (' + top_delayed['Province'] + ')'
-    
-    fig = px.bar(top_delayed, x='ProjectDelay', y='ProjectLabel', orientation='h', color='ProjectDelay', color_continuous_scale=px.colors.sequential.OrRd, template='plotly_white', title="Days Behind Schedule")
-    fig.update_layout(yaxis={'categoryorder':'total ascending'}, height=600)
-    st.plotly_chart(fig, use_container_width=True)
+    with timed("Top 20 Most Delayed Projects", rows=len(df)):
+        top_delayed = precomputed('top_delayed_projects', lambda: top_delayed_projects(df, load_project_descriptions()), filters=filters)
+        
+        fig = px.bar(top_delayed, x='ProjectDelay', y='ProjectLabel', orientation='h', color='ProjectDelay', color_continuous_scale=px.colors.sequential.OrRd, template='plotly_white', title="Days Behind Schedule")
+        fig.update_layout(yaxis={'categoryorder':'total ascending'}, height=600)
+        plotly_chart(fig, use_container_width=True)
 
     st.markdown("---")
 
     col1, col2 = st.columns(2)
-    with col1:
+    with col1, timed("Distribution of Project Delays", rows=len(df)):
         st.subheader("Distribution of Project Delays")
-        fig2 = px.histogram(df[df['ProjectDelay'] > 0], x='ProjectDelay', nbins=50, template='plotly_white', title="Frequency of Delay Durations (in days)")
-        st.plotly_chart(fig2, use_container_width=True)
-    with col2:
+        delay_bins = precomputed('delay_distribution', delay_distribution, df, filters=filters)
+        fig2 = px.bar(delay_bins, x='BinCenter', y='Count', hover_data=['BinStart', 'BinEnd'], template='plotly_white', title="Frequency of Delay Durations (in days)")
+        fig2.update_traces(width=delay_bins['BinEnd'] - delay_bins['BinStart'])
+        fig2.update_layout(bargap=0, xaxis_title='ProjectDelay', yaxis_title='count')
+        plotly_chart(fig2, use_container_width=True)
+    with col2, timed("Average Delay by Region"):
         st.subheader("Average Delay by Region")
-        avg_delay_region = df[df['ProjectDelay'] > 0].groupby('Region')['ProjectDelay'].mean().sort_values().reset_index()
+        avg_delay_region = precomputed('average_delay_by_region', average_delay_by_region, cube, filters=filters)
         fig3 = px.bar(avg_delay_region, x='ProjectDelay', y='Region', orientation='h', template='plotly_white', title="Average Number of Days Delayed")
-        st.plotly_chart(fig3, use_container_width=True)
+        plotly_chart(fig3, use_container_width=True)
+
+render_diagnostics()
@@ -1,22 +1,31 @@
 import streamlit as st
 import plotly.express as px
-from utils import load_project_data, get_geojson
+from analytics import regional_totals
+from geo import SIMPLIFY_LEVELS
+from instrumentation import start_run, timed
+from utils import filter_sidebar, load_rollup, get_geojson, get_region_feature_keys, plotly_chart, precomputed, render_diagnostics
 
 st.set_page_config(layout="wide")
+start_run("Regional Map")
 st.title(" Geographic Map of Projects")
 
-df = load_project_data()
-geojson, feature_key = get_geojson()
+filters = filter_sidebar()
+cube = load_rollup(filters)
+map_detail = st.sidebar.select_slider("Boundary Detail", options=list(SIMPLIFY_LEVELS)[::-1], value='Medium')
+geojson, feature_key = get_geojson(map_detail)
 
-if df is not None and geojson is not None:
+if cube is not None and geojson is not None:
     map_metric = st.sidebar.selectbox("Select Metric to Display on Map", options=['Total Contract Cost', 'Number of Projects'])
 
-    if map_metric == 'Total Contract Cost':
-        agg_data = df.groupby('Region_for_map')['ContractCost'].sum().reset_index()
-        color_col = 'ContractCost'
-    else:
-        agg_data = df.groupby('Region_for_map').size().reset_index(name='Number of Projects')
-        color_col = 'Number of Projects'
+    color_col = 'ContractCost' if map_metric == 'Total Contract Cost' else 'Number of Projects'
+    with timed("Regional Aggregation"):
+        region_summary = precomputed('regional_totals', regional_totals, cube, filters=filters).set_index('Region_std')
+        region_summary = region_summary.rename(columns={'Projects': 'Number of Projects'})
+        region_summary['Region_for_map'] = region_summary.index.map(get_region_feature_keys())
+        unmatched = region_summary.index[region_summary['Region_for_map'].isna()].tolist()
+        agg_data = region_summary.dropna(subset=['Region_for_map']).groupby('Region_for_map', observed=True)[color_col].sum().reset_index()
+    if unmatched:
+        st.warning(f"No map boundary found for: {', '.join(unmatched)}")
 
     st.subheader(f"Map of {map_metric} by Region")
     fig = px.choropleth_mapbox(
@@ -26,5 +35,7 @@ if df is not None and geojson is not None:
         zoom=4.5, center = {"lat": 12.8797, "lon": 121.7740}, opacity=0.6,
     )
     fig.update_layout(margin={"r":0,"t":0,"l":0,"b":0})
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
     st.dataframe(agg_data.sort_values(by=color_col, ascending=False))
+
+render_diagnostics()
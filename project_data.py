@@ -0,0 +1,154 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+PROJECT_DATA_PATH = 'data/Flood_Control_Data.csv'
+
+# Bump whenever clean_project_data or keep_latest changes so cached snapshots are rebuilt
+CLEANING_VERSION = 5
+
+# Extracts larger than this are cleaned chunk by chunk and streamed to the snapshot
+STREAMING_THRESHOLD_BYTES = 256 * 1024 * 1024
+CHUNK_ROWS = 200_000
+
+# Read as text in every chunk, so chunks cannot disagree on the inferred dtype
+TEXT_COLUMNS = ['ProjectID', 'ProjectDescription', 'Region', 'Province', 'ImplementingOffice', 'Contractor', 'PresTerm']
+
+# Low-cardinality text, dictionary-encoded so each row holds a small integer code
+CATEGORY_COLUMNS = ['Region', 'Region_std', 'Province', 'ImplementingOffice', 'Contractor', 'PresTerm']
+
+# Long free text, left out of the shared frame and only loaded for drill-down tables
+LAZY_COLUMNS = ['ProjectDescription']
+
+
+def cost_underrun_pct(df):
+    """Returns the percentage saved from the approved budget, 0 where the budget is zero."""
+    budget = df['ApprovedBudgetForTheContract']
+    underrun = ((budget - df['ContractCost']) / budget) * 100
+    # Handle cases where budget is zero to avoid infinite values
+    return underrun.where(budget != 0, 0).fillna(0)
+
+
+def clean_project_data(df):
+    """Cleans the raw project extract and adds the derived analysis columns."""
+    # Data Cleaning
+    date_columns = ['CompletionDateActual', 'StartDate', 'CompletionDateOriginal']
+    for col in date_columns:
+        df[col] = pd.to_datetime(df[col], errors='coerce')
+
+    currency_columns = ['ApprovedBudgetForTheContract', 'ContractCost']
+    for col in currency_columns:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    
+    df.dropna(subset=date_columns + currency_columns + ['Contractor', 'Region'], inplace=True)
+    
+    # Feature Engineering
+    df['ProjectDelay'] = (df['CompletionDateActual'] - df['CompletionDateOriginal']).dt.days
+    df['BudgetVsCostDifference'] = df['ApprovedBudgetForTheContract'] - df['ContractCost']
+    df['BudgetVsCostPercentage'] = np.where(
+        df['ApprovedBudgetForTheContract'] > 0,
+        (df['BudgetVsCostDifference'] / df['ApprovedBudgetForTheContract']) * 100, 0
+    )
+    df['CostUnderrunPct'] = cost_underrun_pct(df)
+    df['Contractor'] = df['Contractor'].str.strip().str.upper().str.replace(r'\(.*\)', '', regex=True)
+    
+    # Standardize Region Names for mapping
+    region_mapping = {
+        'REGION I': 'Region I (Ilocos Region)', 'REGION II': 'Region II (Cagayan Valley)',
+        'REGION III': 'Region III (Central Luzon)', 'REGION IV-A': 'Region IV-A (CALABARZON)',
+        'REGION IV-B': 'Region IV-B (MIMAROPA)', 'REGION V': 'Region V (Bicol Region)',
+        'REGION VI': 'Region VI (Western Visayas)', 'REGION VII': 'Region VII (Central Visayas)',
+        'REGION VIII': 'Region VIII (Eastern Visayas)', 'REGION IX': 'Region IX (Zamboanga Peninsula)',
+        'REGION X': 'Region X (Northern Mindanao)', 'REGION XI': 'Region XI (Davao Region)',
+        'REGION XII': 'Region XII (SOCCSKSARGEN)', 'REGION XIII': 'Region XIII (Caraga)',
+        'CAR': 'Cordillera Administrative Region (CAR)', 'NCR': 'National Capital Region (NCR)',
+        'BARMM': 'Bangsamoro Autonomous Region in Muslim Mindanao (BARMM)'
+    }
+    df['Region_std'] = df['Region'].str.upper().str.strip().replace(region_mapping)
+
+    return compact_project_data(df.reset_index(drop=True))
+
+
+def compact_project_data(df):
+    """Converts the cleaned frame to its compact dtypes: categoricals, nullable Int32 day counts and a float32 percentage.
+
+    Peso amounts stay float64, as float32 cannot hold them to the centavo.
+    """
+    for col in CATEGORY_COLUMNS:
+        if col in df and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    df['ProjectDelay'] = df['ProjectDelay'].astype('Int32')
+    df['BudgetVsCostPercentage'] = df['BudgetVsCostPercentage'].astype('float32')
+    return df
+
+
+def keep_latest(df):
+    """Keeps the last row of every ProjectID (last write wins); rows without a ProjectID are all kept."""
+    return df[df['ProjectID'].isna() | ~df['ProjectID'].duplicated(keep='last')].reset_index(drop=True)
+
+
+def build_project_data(file_path):
+    """Reads and cleans the project extract at file_path, keeping the last row of each ProjectID."""
+    return keep_latest(clean_project_data(pd.read_csv(file_path, dtype={col: str for col in TEXT_COLUMNS})))
+
+
+def iter_project_data(file_path, chunksize=CHUNK_ROWS):
+    """Yields the cleaned project extract in chunks of at most chunksize rows.
+
+    Every cleaning step works row by row, so the chunks together equal clean_project_data of the
+    whole file. Duplicate ProjectIDs are kept; see keep_latest.
+    """
+    dtypes = {col: str for col in TEXT_COLUMNS}
+    for chunk in pd.read_csv(file_path, chunksize=chunksize, dtype=dtypes):
+        yield clean_project_data(chunk)
+
+
+def _chunk_schema(chunk):
+    schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+    # Text columns can be entirely empty within one chunk, so pin them to string, and categoricals
+    # to 32-bit codes, as each chunk encodes its own dictionary and may need wider codes than the first
+    for i, field in enumerate(schema):
+        if pa.types.is_dictionary(field.type):
+            schema = schema.set(i, pa.field(field.name, pa.dictionary(pa.int32(), pa.string())))
+        elif pa.types.is_null(field.type) or chunk[field.name].dtype == object:
+            schema = schema.set(i, pa.field(field.name, pa.string()))
+    return schema
+
+
+def _drop_superseded(path, chunksize):
+    """Rewrites a Parquet file of the cleaned extract without the rows a later row of their ProjectID replaces."""
+    ids = pd.read_parquet(path, columns=['ProjectID'])['ProjectID']
+    keep = (ids.isna() | ~ids.duplicated(keep='last')).to_numpy()
+    if keep.all():
+        return
+    tmp_path = f'{path}.dedup-{os.getpid()}'
+    source = pq.ParquetFile(path)
+    start = 0
+    with pq.ParquetWriter(tmp_path, source.schema_arrow) as writer:
+        for batch in source.iter_batches(batch_size=chunksize):
+            writer.write_batch(batch.filter(pa.array(keep[start:start + batch.num_rows])))
+            start += batch.num_rows
+    os.replace(tmp_path, path)
+
+
+def write_project_parquet(file_path, out_path, chunksize=CHUNK_ROWS):
+    """Cleans the extract chunk by chunk and appends each chunk to a Parquet file, bounding peak memory.
+
+    As in build_project_data the last row of each ProjectID wins, across chunks too.
+    """
+    writer = None
+    try:
+        for chunk in iter_project_data(file_path, chunksize):
+            if writer is None:
+                schema = _chunk_schema(chunk)
+                writer = pq.ParquetWriter(out_path, schema)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError(f"No rows found in '{file_path}'.")
+    _drop_superseded(out_path, chunksize)
@@ -0,0 +1,222 @@
+"""Optional SQLite store of the cleaned project data for indexed drill-down queries.
+
+Enable with KILATIS_SQL_STORE=1. The store is filled chunk by chunk from the project sources,
+so building and querying it never needs the whole dataset in memory. Later rows replace
+earlier versions of a ProjectID, within an extract and across extracts, as in the project frame.
+"""
+import json
+import math
+import os
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import pandas as pd
+
+from filters import COST_BANDS
+from project_data import CLEANING_VERSION, iter_project_data, keep_latest
+from snapshot import CACHE_DIR, file_fingerprint
+
+ENABLED = os.environ.get('KILATIS_SQL_STORE', '') not in ('', '0', 'false')
+STORE_PATH = os.path.join(CACHE_DIR, 'projects.sqlite')
+
+# Bump whenever the table layout or the indexes change so stores are rebuilt
+STORE_VERSION = 1
+
+DATE_COLUMNS = ['StartDate', 'CompletionDateOriginal', 'CompletionDateActual']
+STORE_COLUMNS = {
+    'ProjectID': 'TEXT', 'ProjectDescription': 'TEXT', 'Region': 'TEXT', 'Region_std': 'TEXT',
+    'Province': 'TEXT', 'ImplementingOffice': 'TEXT', 'Contractor': 'TEXT', 'PresTerm': 'TEXT',
+    'StartDate': 'TEXT', 'CompletionDateOriginal': 'TEXT', 'CompletionDateActual': 'TEXT',
+    'ApprovedBudgetForTheContract': 'REAL', 'ContractCost': 'REAL', 'ProjectDelay': 'INTEGER',
+    'CostUnderrunPct': 'REAL',
+}
+
+# Drill-down keys, each paired with ProjectDelay so "most delayed first" reads straight off the index
+INDEXED_COLUMNS = ['Contractor', 'Province', 'ImplementingOffice', 'Region_std']
+
+
+def _manifest_key():
+    return [STORE_VERSION, CLEANING_VERSION]
+
+
+def _read_manifest(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with closing(sqlite3.connect(path)) as con:
+            (value,) = con.execute('SELECT value FROM manifest').fetchone()
+        return json.loads(value)
+    except (sqlite3.Error, TypeError, ValueError):
+        return None
+
+
+def _create_schema(con):
+    columns = ', '.join(f'{name} {sql_type}' for name, sql_type in STORE_COLUMNS.items())
+    con.execute('PRAGMA journal_mode=WAL')
+    con.execute(f'CREATE TABLE IF NOT EXISTS projects ({columns})')
+    con.execute('CREATE TABLE IF NOT EXISTS manifest (value TEXT)')
+    con.execute('CREATE INDEX IF NOT EXISTS idx_projects_id ON projects (ProjectID)')
+
+
+def _create_indexes(con):
+    for col in INDEXED_COLUMNS:
+        con.execute(f'CREATE INDEX IF NOT EXISTS idx_projects_{col} ON projects ({col}, ProjectDelay)')
+    con.execute('CREATE INDEX IF NOT EXISTS idx_projects_delay ON projects (ProjectDelay)')
+
+
+def _records(chunk):
+    rows = pd.DataFrame({col: chunk[col] for col in STORE_COLUMNS})
+    for col in DATE_COLUMNS:
+        rows[col] = rows[col].dt.strftime('%Y-%m-%d')
+    rows = rows.astype(object)
+    return rows.where(rows.notna(), None).itertuples(index=False, name=None)
+
+
+def _insert(con, chunk):
+    # The last row of a ProjectID wins, within the chunk and over earlier chunks and extracts
+    chunk = keep_latest(chunk)
+    ids = chunk['ProjectID'].dropna()
+    con.executemany('DELETE FROM projects WHERE ProjectID = ?', ((project_id,) for project_id in ids))
+    placeholders = ', '.join('?' * len(STORE_COLUMNS))
+    con.executemany(f"INSERT INTO projects ({', '.join(STORE_COLUMNS)}) VALUES ({placeholders})", _records(chunk))
+
+
+def sync_store(sources, path=STORE_PATH):
+    """Loads any sources not yet in the store and returns its path.
+
+    As with the dataset, the store is rebuilt from scratch when an already loaded extract
+    changed or moved, or when the cleaning logic or the store layout changed.
+    """
+    manifest = _read_manifest(path)
+    is_prefix = (
+        manifest is not None
+        and manifest['version'] == _manifest_key()
+        and len(manifest['extracts']) <= len(sources)
+        and all(
+            entry['path'] == source and file_fingerprint(source, entry['fingerprint']) == entry['fingerprint']
+            for entry, source in zip(manifest['extracts'], sources)
+        )
+    )
+    if not is_prefix:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        manifest = {'version': _manifest_key(), 'extracts': []}
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    con = sqlite3.connect(path)
+    try:
+        _create_schema(con)
+        for source in sources[len(manifest['extracts']):]:
+            # One transaction per extract, so an interrupted load leaves the previous state intact
+            with con:
+                for chunk in iter_project_data(source):
+                    _insert(con, chunk)
+                manifest['extracts'].append({'path': source, 'fingerprint': file_fingerprint(source)})
+                con.execute('DELETE FROM manifest')
+                con.execute('INSERT INTO manifest VALUES (?)', (json.dumps(manifest),))
+        with con:
+            _create_indexes(con)
+    finally:
+        con.close()
+    return path
+
+
+# --- Query API ---
+
+def _connect(path):
+    return sqlite3.connect(f'{Path(path).resolve().as_uri()}?mode=ro', uri=True)
+
+
+def _column(name):
+    if name not in STORE_COLUMNS:
+        raise ValueError(f"Unknown project column '{name}'.")
+    return name
+
+
+def _scope(scope):
+    """SQL clauses and parameters selecting the same rows as filters.filter_mask of a ProjectFilter."""
+    clauses, params = [], []
+    if scope is None:
+        return clauses, params
+    if scope.years is not None:
+        clauses.append('StartDate >= ? AND StartDate < ?')
+        params += [f'{scope.years[0]:04d}-01-01', f'{scope.years[1] + 1:04d}-01-01']
+    for col, values in [('Region_std', scope.regions), ('PresTerm', scope.terms)]:
+        if values:
+            clauses.append(f"{col} IN ({', '.join('?' * len(values))})")
+            params += list(values)
+    if scope.cost_bands:
+        bands = [COST_BANDS[band] for band in scope.cost_bands]
+        clauses.append('(' + ' OR '.join(
+            'ContractCost >= ?' if math.isinf(high) else '(ContractCost >= ? AND ContractCost < ?)' for _, high in bands
+        ) + ')')
+        for low, high in bands:
+            params += [low] if math.isinf(high) else [low, high]
+    return clauses, params
+
+
+def _where(filters, delayed_only, scope=None):
+    clauses = [f'{_column(col)} = ?' for col in filters or {}]
+    params = [str(value) for value in (filters or {}).values()]
+    if delayed_only:
+        clauses.append('ProjectDelay > 0')
+    scope_clauses, scope_params = _scope(scope)
+    clauses += scope_clauses
+    sql = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+    return sql, params + scope_params
+
+
+def _read_sql(path, sql, params):
+    with closing(_connect(path)) as con:
+        df = pd.read_sql_query(sql, con, params=params)
+    for col in DATE_COLUMNS:
+        if col in df:
+            df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def count_projects(path, filters=None, delayed_only=False, scope=None):
+    """Number of projects matching the {column: value} filters, within an optional global ProjectFilter scope."""
+    where, params = _where(filters, delayed_only, scope)
+    with closing(_connect(path)) as con:
+        return con.execute(f'SELECT COUNT(*) FROM projects{where}', params).fetchone()[0]
+
+
+def query_projects(path, filters=None, columns=None, sort_by=None, ascending=True, limit=None, offset=0,
+                   delayed_only=False, scope=None):
+    """Returns the projects matching the {column: value} filters, optionally sorted and windowed.
+
+    Missing sort values come last, as in DataFrame.sort_values. Sorting by ProjectDelay
+    within an equality filter on an indexed column reads rows in index order without a sort.
+    """
+    select = ', '.join(_column(col) for col in columns) if columns else '*'
+    where, params = _where(filters, delayed_only, scope)
+    sql = f'SELECT {select} FROM projects{where}'
+    if sort_by is not None:
+        sort_by = _column(sort_by)
+        # SQLite sorts NULL lowest, so they already come last when descending
+        sql += f" ORDER BY {sort_by} {'ASC NULLS LAST' if ascending else 'DESC'}"
+    if limit is not None:
+        sql += ' LIMIT ? OFFSET ?'
+        params += [limit, offset]
+    return _read_sql(path, sql, params)
+
+
+def top_delayed(path, filters=None, columns=None, n=20, scope=None):
+    """The n most delayed projects matching the filters."""
+    return query_projects(
+        path, filters, columns, sort_by='ProjectDelay', ascending=False, limit=n, delayed_only=True, scope=scope
+    )
+
+
+def value_by(path, by, filters=None, n=None, scope=None):
+    """Total ContractCost per value of `by` among the projects matching the filters, largest first."""
+    where, params = _where(filters, False, scope)
+    by = _column(by)
+    sql = f'SELECT {by}, SUM(ContractCost) AS ContractCost FROM projects{where} GROUP BY {by} ORDER BY 2 DESC'
+    if n is not None:
+        sql += ' LIMIT ?'
+        params.append(n)
+    return _read_sql(path, sql, params)
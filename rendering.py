@@ -0,0 +1,65 @@
+"""Server-side reductions that keep chart and table payloads independent of the dataset size."""
+import numpy as np
+import pandas as pd
+
+HISTOGRAM_BINS = 50
+TABLE_PAGE_SIZE = 100
+MAX_SELECT_OPTIONS = 500
+MAX_CHART_CATEGORIES = 50
+
+
+def histogram_frame(values, nbins=HISTOGRAM_BINS):
+    """Bins values with NumPy and returns one row per bin (BinStart, BinEnd, BinCenter, Count)."""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    counts, edges = np.histogram(values, bins=nbins)
+    return pd.DataFrame({
+        'BinStart': edges[:-1],
+        'BinEnd': edges[1:],
+        'BinCenter': (edges[:-1] + edges[1:]) / 2,
+        'Count': counts,
+    })
+
+
+def sorted_window(df, sort_by, ascending, start, stop):
+    """Returns rows start:stop of df sorted by one column without sorting the whole frame.
+
+    Matches df.sort_values(sort_by, kind='stable'), so ties keep their row order and the pages of
+    a table never overlap. Numeric columns only sort the rows up to the `stop`-th key, and every
+    row tied with it.
+    """
+    stop = min(stop, len(df))
+    if start >= stop:
+        return df.iloc[0:0]
+    if not pd.api.types.is_numeric_dtype(df[sort_by]) or pd.api.types.is_bool_dtype(df[sort_by]):
+        return df.sort_values(by=sort_by, ascending=ascending, kind='stable').iloc[start:stop]
+
+    values = df[sort_by].to_numpy(dtype=float, na_value=np.nan)
+    keys = values if ascending else -values
+    keys = np.where(np.isnan(keys), np.inf, keys)  # Missing values sort last, as in sort_values
+    if stop < len(keys):
+        boundary = np.partition(keys, stop - 1)[stop - 1]
+        candidates = np.flatnonzero(keys <= boundary)
+    else:
+        candidates = np.arange(len(keys))
+    # Ties are broken by row position
+    order = candidates[np.lexsort((candidates, keys[candidates]))]
+    return df.iloc[order[start:stop]]
+
+
+def top_n_with_other(df, label_col, value_col, n=MAX_CHART_CATEGORIES, other_label='Others'):
+    """Keeps the n largest rows by value_col and folds the rest into a single 'Others' row."""
+    if len(df) <= n:
+        return df
+    top = df.nlargest(n, value_col)
+    rest = df.drop(top.index)
+    other = pd.DataFrame({label_col: [other_label], value_col: [rest[value_col].sum()]})
+    return pd.concat([top[[label_col, value_col]], other], ignore_index=True)
+
+
+def filter_options(options, query, limit=MAX_SELECT_OPTIONS):
+    """Returns at most `limit` options containing the query (case-insensitive), in their original order."""
+    options = pd.Series(options, dtype=object)
+    if query:
+        options = options[options.astype(str).str.contains(query, case=False, regex=False)]
+    return options.iloc[:limit].tolist()
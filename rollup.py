@@ -0,0 +1,60 @@
+import pandas as pd
+
+# Dimensions of the rollup cube. Region is kept next to Region_std so pages can keep their labels.
+ROLLUP_DIMENSIONS = ['Region_std', 'Region', 'Province', 'Contractor', 'PresTerm', 'StartYear']
+
+# Additive measures, safe to re-sum over any subset of the dimensions
+ROLLUP_MEASURES = ['Projects', 'ContractCost', 'ApprovedBudgetForTheContract', 'DelayedProjects', 'TotalDelay']
+
+
+def build_rollup(df):
+    """Aggregates the project frame into additive measures over the rollup dimensions."""
+    # Measures are plain float64, whatever the compact dtype of the day counts
+    delay = df['ProjectDelay'].astype('float64')
+    delayed = delay > 0
+    measures = pd.DataFrame({
+        'Projects': 1,
+        'ContractCost': df['ContractCost'],
+        'ApprovedBudgetForTheContract': df['ApprovedBudgetForTheContract'],
+        'DelayedProjects': delayed.astype('int64'),
+        'TotalDelay': delay.where(delayed, 0),
+    }, index=df.index)
+    keys = [df[col] for col in ROLLUP_DIMENSIONS[:-1]] + [df['StartDate'].dt.year.rename('StartYear')]
+    return measures.groupby(keys, dropna=False, observed=True).sum().reset_index()
+
+
+def combine_rollups(cubes):
+    """Folds partial cubes, e.g. one per ingest chunk, into a single cube."""
+    combined = None
+    for cube in cubes:
+        parts = [cube] if combined is None else [combined, cube]
+        combined = (
+            pd.concat(parts, ignore_index=True)
+            .groupby(ROLLUP_DIMENSIONS, dropna=False, observed=True)[ROLLUP_MEASURES].sum()
+            .reset_index()
+        )
+    return combined
+
+
+def summarize(cube, by, filters=None):
+    """Re-sums the cube over the given dimension(s), optionally restricted by {dimension: value(s)}.
+
+    Adds AverageDelay, the mean delay of delayed projects, to the result.
+    """
+    if filters:
+        mask = pd.Series(True, index=cube.index)
+        for col, value in filters.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            mask &= cube[col].isin(values)
+        cube = cube[mask]
+
+    summary = cube.groupby(by, observed=True)[ROLLUP_MEASURES].sum()
+    summary['AverageDelay'] = summary['TotalDelay'] / summary['DelayedProjects'].where(summary['DelayedProjects'] > 0)
+    return summary
+
+
+def totals(cube):
+    """Returns the national totals of every measure plus AverageDelay."""
+    total = cube[ROLLUP_MEASURES].sum()
+    total['AverageDelay'] = total['TotalDelay'] / total['DelayedProjects'] if total['DelayedProjects'] else float('nan')
+    return total
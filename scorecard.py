@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from anomaly import ANOMALY_THRESHOLD
+
+# Scorecard entity types as shown in the page selectbox, mapped to their grouping column
+ENTITY_COLUMNS = {
+    'Provinces': 'Province',
+    'Implementing Offices': 'ImplementingOffice',
+    'Contractors': 'Contractor',
+}
+
+# Projects saving less than this percentage of the approved budget are flagged
+LOW_UNDERRUN_THRESHOLD = 1
+
+
+def _top_3_concentration(df, agg_col, total_value, project_counts):
+    """Share of each entity's contract value awarded to its top 3 contractors, without a per-group apply."""
+    entity = df[agg_col].rename('Entity')
+    pair_value = df['ContractCost'].groupby([entity, df['Contractor']], observed=True).sum().reset_index(name='Value')
+    pair_value = pair_value.sort_values(['Entity', 'Value'], ascending=[True, False])
+    top_3 = pair_value[pair_value.groupby('Entity', observed=True).cumcount() < 3].groupby('Entity', observed=True)['Value'].sum()
+    top_3 = top_3.reindex(total_value.index, fill_value=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = np.where(total_value > 0, top_3 / total_value * 100, 0)
+    # Entities with fewer than 3 projects are fully concentrated by definition
+    return pd.Series(np.where(project_counts < 3, 100.0, pct), index=total_value.index)
+
+
+def compute_scorecard(df, agg_col):
+    """Computes the risk factor scorecard for one entity column in a single vectorized pass.
+
+    Reads the CostUnderrunPct and BidRatioZ columns derived at load time instead of adding them to df.
+    """
+    underrun = df['CostUnderrunPct']
+    metrics = pd.DataFrame({
+        'ProjectID': df['ProjectID'],
+        'ContractCost': df['ContractCost'],
+        'ProjectDelay': df['ProjectDelay'],
+        'CostUnderrunPct': underrun,
+        'LowUnderrun': underrun < LOW_UNDERRUN_THRESHOLD,
+        'BidOutlier': df['BidRatioZ'].abs() > ANOMALY_THRESHOLD,
+    })
+    grouped = metrics.groupby(df[agg_col].rename(agg_col), observed=True)
+    scorecard = grouped.agg(
+        Total_Projects=('ProjectID', 'count'),
+        Total_Contract_Value=('ContractCost', 'sum'),
+        Average_Delay_Days=('ProjectDelay', 'mean'),
+        Avg_Cost_Underrun_Pct=('CostUnderrunPct', 'mean'),
+        Low_Underrun_Projects=('LowUnderrun', 'sum'),
+        Bid_Outlier_Projects=('BidOutlier', 'sum'),
+    )
+    scorecard['Top_3_Contractor_Concentration_Pct'] = _top_3_concentration(
+        df, agg_col, scorecard['Total_Contract_Value'], grouped.size()
+    )
+    scorecard = scorecard.fillna(0)
+
+    # Calculate percentage of projects with low underrun
+    scorecard['Low_Underrun_Pct_of_Projects'] = (scorecard['Low_Underrun_Projects'] / scorecard['Total_Projects']) * 100
+    # Percentage of projects whose bid ratio is an outlier among their peers
+    scorecard['Bid_Outlier_Pct_of_Projects'] = (scorecard['Bid_Outlier_Projects'] / scorecard['Total_Projects']) * 100
+    return scorecard.reset_index()
+
+
+def compute_all_scorecards(df):
+    """Computes the scorecard for every entity type, keyed by the grouping column."""
+    return {agg_col: compute_scorecard(df, agg_col) for agg_col in ENTITY_COLUMNS.values()}
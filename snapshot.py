@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+CACHE_DIR = '.cache'
+
+
+def file_fingerprint(file_path, previous=None):
+    """Returns the size, mtime and content hash of a source file.
+
+    Hashing is skipped when size and mtime match a previously recorded fingerprint.
+    """
+    stat = os.stat(file_path)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if previous and all(previous.get(k) == v for k, v in fingerprint.items()):
+        fingerprint['sha1'] = previous['sha1']
+        return fingerprint
+
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    fingerprint['sha1'] = digest.hexdigest()
+    return fingerprint
+
+
+def _manifest_path(name):
+    return os.path.join(CACHE_DIR, f'{name}.json')
+
+
+def _read_manifest(name):
+    try:
+        with open(_manifest_path(name)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+def _write_atomic(path, write_fn):
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    write_fn(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def read_columns(path, columns=None, exclude=()):
+    """Reads a Parquet file memory-mapped, restricted to the given columns and without the excluded ones."""
+    if exclude:
+        columns = [col for col in (columns or pq.read_schema(path).names) if col not in exclude]
+    return pd.read_parquet(path, columns=columns, memory_map=True)
+
+
+def load_snapshot(name, source_path, build_fn, version, streaming=False, columns=None, exclude=()):
+    """Returns the cached Parquet snapshot of build_fn(source_path), rebuilding it when stale.
+
+    The snapshot is keyed by the source file fingerprint and the transform version,
+    so it is only rebuilt when the source file or the cleaning logic changes.
+    With streaming=True, build_fn(source_path, path) writes the Parquet file itself
+    and the snapshot is read back from disk instead of being held in memory while built.
+    columns and exclude select the returned columns, so unused ones are never read.
+    """
+    manifest = _read_manifest(name)
+    fingerprint = file_fingerprint(source_path, manifest.get('source'))
+    key = hashlib.sha1(f"{fingerprint['sha1']}:{version}".encode()).hexdigest()[:16]
+    snapshot_path = os.path.join(CACHE_DIR, f'{name}-{key}.parquet')
+
+    if manifest.get('key') == key and os.path.exists(snapshot_path):
+        try:
+            return read_columns(snapshot_path, columns, exclude)
+        except (OSError, ValueError):
+            pass  # Corrupt or unreadable snapshot, rebuild below
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    if streaming:
+        _write_atomic(snapshot_path, lambda p: build_fn(source_path, p))
+        df = read_columns(snapshot_path, columns, exclude)
+    else:
+        df = build_fn(source_path)
+        _write_atomic(snapshot_path, lambda p: df.to_parquet(p, index=False))
+        df = df[[col for col in (columns or df.columns) if col not in exclude]]
+
+    previous_path = manifest.get('path')
+    if previous_path and previous_path != snapshot_path and os.path.exists(previous_path):
+        os.remove(previous_path)
+
+    manifest = {'key': key, 'version': version, 'source': fingerprint, 'path': snapshot_path}
+    _write_atomic(_manifest_path(name), lambda p: _write_json(p, manifest))
+    return df
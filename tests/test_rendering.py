@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rendering import sorted_window
+
+
+def _pages(df, sort_by, ascending, page_size):
+    return pd.concat([
+        sorted_window(df, sort_by, ascending, start, start + page_size) for start in range(0, len(df), page_size)
+    ])
+
+
+@pytest.mark.parametrize('ascending', [True, False])
+@pytest.mark.parametrize('column', ['ties', 'nullable', 'floats', 'labels'])
+def test_pages_concatenate_to_a_stable_sort(column, ascending):
+    rng = np.random.default_rng(0)
+    n = 5_000
+    nullable = pd.array(rng.integers(0, 20, n), dtype='Int32')
+    nullable[rng.random(n) < 0.1] = pd.NA
+    df = pd.DataFrame({
+        'ties': rng.integers(0, 20, n),
+        'nullable': nullable,
+        'floats': np.where(rng.random(n) < 0.1, np.nan, rng.normal(size=n).round(1)),
+        'labels': rng.choice(list('abcde'), n),
+    })
+
+    expected = df.sort_values(column, ascending=ascending, kind='stable')
+    pd.testing.assert_frame_equal(_pages(df, column, ascending, 100), expected)
+
+
+def test_window_past_the_end_is_empty():
+    df = pd.DataFrame({'x': [3, 1, 2]})
+    assert sorted_window(df, 'x', True, 5, 10).empty
+    pd.testing.assert_frame_equal(sorted_window(df, 'x', True, 1, 10), df.iloc[[2, 0]])
@@ -1,66 +1,377 @@
-import streamlit as st
+import importlib
+
 import pandas as pd
-import numpy as np
-import requests
+import streamlit as st
+
+from analytics.batch import current_results, read_artefact, results_marker
+from anomaly import score_projects
+from budget_data import (
+    AGENCY_BUDGET_PATH, BUDGET_CLEANING_VERSION, BUDGET_SUMMARY_PATH, NEP_GAA_PATH,
+    build_agency_budgets, build_budget_summary, build_nep_gaa,
+)
+from contractor_index import ContractorIndex
+from dataset import load_project_baseline, load_project_frame, load_project_rollup, project_sources, sources_version
+from filters import COST_BANDS, NO_FILTER, ViewCache, describe_filter, filter_mask, normalize_filter
+from geo import FEATURE_PROPERTY, SIMPLIFY_LEVELS, match_regions, read_geojson, simplify_geojson
+from instrumentation import flush_run, instrumented, timed
+from network import GROUP_COLUMNS, ContractorNetwork, build_network
+from project_data import LAZY_COLUMNS, PROJECT_DATA_PATH
+import project_store
+from rendering import MAX_SELECT_OPTIONS, TABLE_PAGE_SIZE, filter_options, sorted_window
+from rollup import build_rollup
+from scorecard import ENTITY_COLUMNS, compute_scorecard
+from snapshot import load_snapshot
+import warmup
+
+# Shallow copies become lazy read-only views: a page that changes one never touches the shared frame
+pd.set_option('mode.copy_on_write', True)
+
+def data_version():
+    """Cheap marker of the project sources, so cached loaders refresh when an extract is added or changed."""
+    return sources_version(project_sources())
+
+@st.cache_resource
+def _view_cache():
+    return ViewCache()
+
+def filtered(name, filters, build):
+    """Returns build() for an active global filter, from the LRU cache of filtered views shared by all sessions."""
+    with timed(f"filtered: {name}") as span:
+        value, hit = _view_cache().get((data_version(), filters, name), build)
+        span['cache'] = 'hit' if hit else 'miss'
+    return value.copy(deep=False) if isinstance(value, (pd.DataFrame, pd.Series)) else value
 
-@st.cache_data
-def load_project_data():
-    """Loads and processes the main flood control project data."""
-    file_path = 'data/Flood_Control_Data.csv'
+def load_project_data(filters=NO_FILTER):
+    """Returns a view of the shared project data, without the long text columns, restricted to the global filters.
+
+    The frame is loaded once per process and shared by every session; callers get a
+    copy-on-write view, so no rerun pays for a copy of the data. Filtered rows keep their
+    positions in the full frame as index labels. Anomaly scores are computed against the
+    unfiltered peer groups.
+    """
+    df = _load_project_data(data_version())
+    if df is None:
+        return None
+    if filters != NO_FILTER:
+        return filtered('project_data', filters, lambda: df[filter_mask(df, filters)])
+    return df.copy(deep=False)
+
+@instrumented(st.cache_resource(max_entries=1), name='load_project_data')
+def _load_project_data(version):
+    sources = [path for path, _, _ in version]
     try:
-        df = pd.read_csv(file_path)
+        df = load_project_frame(sources, exclude=LAZY_COLUMNS)
+    except FileNotFoundError as e:
+        st.error(f"Error: The file '{e.filename or PROJECT_DATA_PATH}' was not found.")
+        return None
+    return score_projects(df, load_project_baseline(df, sources))
+
+def load_project_descriptions():
+    """Loads the ProjectDescription column on first use, aligned with the index of load_project_data."""
+    return _load_project_descriptions(data_version())
+
+@instrumented(st.cache_resource(max_entries=1), name='load_project_descriptions')
+def _load_project_descriptions(version):
+    return load_project_frame([path for path, _, _ in version], columns=LAZY_COLUMNS)['ProjectDescription']
+
+def with_descriptions(df):
+    """Adds the ProjectDescription column to rows of the project data for drill-down tables."""
+    return df.assign(ProjectDescription=load_project_descriptions().loc[df.index])
+
+def load_project_store():
+    """Returns the path of the SQLite project store, synced with the sources, or None when it is disabled."""
+    if not project_store.ENABLED:
+        return None
+    return _load_project_store(data_version())
+
+@instrumented(st.cache_resource(max_entries=1), name='load_project_store')
+def _load_project_store(version):
+    try:
+        return project_store.sync_store([path for path, _, _ in version])
     except FileNotFoundError:
-        st.error(f"Error: The file '{file_path}' was not found.")
         return None
 
-    # Data Cleaning
-    date_columns = ['CompletionDateActual', 'StartDate', 'CompletionDateOriginal']
-    for col in date_columns:
-        df[col] = pd.to_datetime(df[col], errors='coerce')
-
-    currency_columns = ['ApprovedBudgetForTheContract', 'ContractCost']
-    for col in currency_columns:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    df.dropna(subset=date_columns + currency_columns + ['Contractor', 'Region'], inplace=True)
-    
-    # Feature Engineering
-    df['ProjectDelay'] = (df['CompletionDateActual'] - df['CompletionDateOriginal']).dt.days
-    df['BudgetVsCostDifference'] = df['ApprovedBudgetForTheContract'] - df['ContractCost']
-    df['BudgetVsCostPercentage'] = np.where(
-        df['ApprovedBudgetForTheContract'] > 0,
-        (df['BudgetVsCostDifference'] / df['ApprovedBudgetForTheContract']) * 100, 0
-    )
-    df['Contractor'] = df['Contractor'].str.strip().str.upper().str.replace(r'\(.*\)', '', regex=True)
-    
-    # Standardize Region Names for mapping
-    region_mapping = {
-        'REGION I': 'Region I (Ilocos Region)', 'REGION II': 'Region II (Cagayan Valley)',
-        'REGION III': 'Region III (Central Luzon)', 'REGION IV-A': 'Region IV-A (CALABARZON)',
-        'REGION IV-B': 'Region IV-B (MIMAROPA)', 'REGION V': 'Region V (Bicol Region)',
-        'REGION VI': 'Region VI (Western Visayas)', 'REGION VII': 'Region VII (Central Visayas)',
-        'REGION VIII': 'Region VIII (Eastern Visayas)', 'REGION IX': 'Region IX (Zamboanga Peninsula)',
-        'REGION X': 'Region X (Northern Mindanao)', 'REGION XI': 'Region XI (Davao Region)',
-        'REGION XII': 'Region XII (SOCCSKSARGEN)', 'REGION XIII': 'Region XIII (Caraga)',
-        'CAR': 'Cordillera Administrative Region (CAR)', 'NCR': 'National Capital Region (NCR)',
-        'BARMM': 'Bangsamoro Autonomous Region in Muslim Mindanao (BARMM)'
+def load_rollup(filters=NO_FILTER):
+    """Returns a view of the shared rollup cube of the project data, restricted to the global filters."""
+    if filters != NO_FILTER:
+        df = load_project_data(filters)
+        return None if df is None else filtered('rollup', filters, lambda: build_rollup(df))
+    cube = _load_rollup(data_version())
+    return None if cube is None else cube.copy(deep=False)
+
+@instrumented(st.cache_resource(max_entries=1), name='load_rollup')
+def _load_rollup(version):
+    df = _load_project_data(version)
+    if df is None:
+        return None
+    return load_project_rollup(df, [path for path, _, _ in version])
+
+@instrumented(st.cache_data(max_entries=1), name='load_precomputed_results')
+def _current_results(marker):
+    return current_results()
+
+@instrumented(st.cache_data, name='read_precomputed')
+def _read_artefact(out_dir, name):
+    return read_artefact(out_dir, name)
+
+def has_precomputed(*names, filters=NO_FILTER):
+    """True when the batch results hold all the named artefacts for these filters, so showing them needs no data load."""
+    if filters != NO_FILTER:
+        return False
+    results = _current_results(results_marker())
+    return results is not None and all(name in results[1]['artefacts'] for name in names)
+
+def precomputed(name, compute, *args, filters=NO_FILTER):
+    """Returns the batch-precomputed artefact when it matches the current data, else compute(*args).
+
+    Under active global filters, compute(*args) runs on the filtered inputs and is kept in the filtered view cache.
+    """
+    if filters != NO_FILTER:
+        return filtered(name, filters, lambda: compute(*args))
+    results = _current_results(results_marker())
+    if results is not None and name in results[1]['artefacts']:
+        return _read_artefact(results[0], name)
+    return compute(*args)
+
+def load_contractor_index():
+    """Builds the contractor index once per process and shares it across sessions."""
+    return _load_contractor_index(data_version())
+
+@instrumented(st.cache_resource(max_entries=1), name='load_contractor_index')
+def _load_contractor_index(version):
+    df = _load_project_data(version)
+    if df is None:
+        return None
+    return ContractorIndex(df['Contractor'])
+
+def load_scorecard(agg_col, filters=NO_FILTER):
+    """Computes and caches the risk factor scorecard for one entity column."""
+    if filters != NO_FILTER:
+        df = load_project_data(filters)
+        return None if df is None else filtered(f'scorecard_{agg_col}', filters, lambda: compute_scorecard(df, agg_col))
+    return _load_scorecard(agg_col, data_version())
+
+@instrumented(st.cache_data, name='load_scorecard')
+def _load_scorecard(agg_col, version):
+    df = _load_project_data(version)
+    if df is None:
+        return None
+    return precomputed(f'scorecard_{agg_col}', compute_scorecard, df, agg_col)
+
+def load_contractor_network(group_col='ImplementingOffice', filters=NO_FILTER):
+    """Builds and caches the contractor co-location network over group_col, restricted to the global filters."""
+    if filters != NO_FILTER:
+        df = load_project_data(filters)
+        return None if df is None else filtered(f'network_{group_col}', filters, lambda: build_network(df, group_col))
+    return _load_contractor_network(group_col, data_version())
+
+@instrumented(st.cache_resource(max_entries=len(GROUP_COLUMNS)), name='load_contractor_network')
+def _load_contractor_network(group_col, version):
+    df = _load_project_data(version)
+    if df is None:
+        return None
+    names = [f'network_{part}_{group_col}' for part in ContractorNetwork._fields]
+    if has_precomputed(*names):
+        out_dir = _current_results(results_marker())[0]
+        return ContractorNetwork(*(_read_artefact(out_dir, name) for name in names))
+    return build_network(df, group_col)
+
+@instrumented(st.cache_data)
+def load_budget_summary():
+    """Loads and caches the DPWH yearly budget summary (FISCAL YEAR, AMOUNT)."""
+    return load_snapshot('budget_summary', BUDGET_SUMMARY_PATH, build_budget_summary, BUDGET_CLEANING_VERSION)
+
+@instrumented(st.cache_data)
+def load_nep_gaa():
+    """Loads and caches the 2025 NEP vs. GAA comparison of DPWH programs."""
+    return load_snapshot('nep_gaa', NEP_GAA_PATH, build_nep_gaa, BUDGET_CLEANING_VERSION)
+
+@instrumented(st.cache_data)
+def load_agency_budgets():
+    """Loads and caches the GAA per agency table, one column per fiscal year."""
+    return load_snapshot('agency_budgets', AGENCY_BUDGET_PATH, build_agency_budgets, BUDGET_CLEANING_VERSION)
+
+@instrumented(st.cache_data(max_entries=1), name='filter_options')
+def _filter_options(version):
+    cube = _load_rollup(version)
+    if cube is None or cube.empty:
+        return None
+    years = cube['StartYear'].dropna()
+    return {
+        'years': (int(years.min()), int(years.max())),
+        'regions': sorted(cube['Region_std'].dropna().astype(object).unique()),
+        'terms': sorted(cube['PresTerm'].dropna().astype(object).unique()),
     }
-    df['Region_std'] = df['Region'].str.upper().str.strip().replace(region_mapping)
 
-    return df
+def _kept(widget, label, key, value, **kwargs):
+    """Renders a widget whose value follows the user across pages, kept under a session key no widget owns."""
+    widget_key = f'_{key}'
+    if widget_key not in st.session_state:
+        st.session_state[widget_key] = value
+    st.session_state[key] = widget(label, key=widget_key, **kwargs)
+    return st.session_state[key]
+
+def filter_sidebar(wait=True):
+    """Renders the global filter bar in the sidebar and returns the normalized ProjectFilter.
 
-@st.cache_data
-def get_geojson():
-    """Fetches and caches the GeoJSON for PH regions from a reliable URL."""
-    # This is a new, working URL for the GeoJSON file
-    url = "https://raw.githubusercontent.com/faeldon/philippines-json-maps/master/geojson/regions.json"
+    With wait=False, a session without filters does not wait for the filter options while the
+    background warm-up is still loading the data; pair it with rerun_when_warm('filter_options').
+    """
+    state = start_warmup()
+    if not wait and state is not None and not state.ready('filter_options') and 'filter_years' not in st.session_state:
+        finished, total = state.progress()
+        st.sidebar.caption(f"Loading data in the background ({finished}/{total} ready); filters appear when it is done.")
+        return NO_FILTER
+    options = _filter_options(data_version())
+    if options is None:
+        return NO_FILTER
+    low, high = options['years']
+    kept = st.session_state
+    with st.sidebar.expander("Global Filters", expanded=True):
+        years = None
+        if low < high:
+            kept_low, kept_high = kept.get('filter_years', (low, high))
+            years = _kept(
+                st.slider, "Start year", 'filter_years', (min(max(kept_low, low), high), max(min(kept_high, high), low)),
+                min_value=low, max_value=high,
+            )
+        regions = _kept(
+            st.multiselect, "Region", 'filter_regions',
+            [r for r in kept.get('filter_regions', []) if r in options['regions']], options=options['regions'],
+        )
+        terms = _kept(
+            st.multiselect, "Presidential term", 'filter_terms',
+            [t for t in kept.get('filter_terms', []) if t in options['terms']], options=options['terms'],
+        )
+        cost_bands = _kept(
+            st.multiselect, "Contract cost", 'filter_cost_bands', kept.get('filter_cost_bands', []), options=list(COST_BANDS),
+        )
+    filters = normalize_filter(years, regions, terms, cost_bands, (low, high), options['regions'], options['terms'])
+    if filters != NO_FILTER:
+        st.sidebar.caption(f"Filtered to: {describe_filter(filters)}")
+    return filters
+
+def _warmup_stages(version):
+    """Every data cache a page reads: first what all pages wait on, then the rest."""
+    first = {
+        'project_data': lambda: _load_project_data(version),
+        'precomputed_results': lambda: _current_results(results_marker()),
+        'rollup': lambda: _load_rollup(version),
+        'filter_options': lambda: _filter_options(version),
+    }
+    rest = {
+        'plotly': lambda: importlib.import_module('plotly.express'),
+        'budget_summary': load_budget_summary,
+        'nep_gaa': load_nep_gaa,
+        'agency_budgets': load_agency_budgets,
+        'geojson': get_geojson,
+        'region_feature_keys': lambda: _get_region_feature_keys(version),
+        'contractor_index': lambda: _load_contractor_index(version),
+        'project_descriptions': lambda: _load_project_descriptions(version),
+    }
+    for agg_col in ENTITY_COLUMNS.values():
+        rest[f'scorecard_{agg_col}'] = lambda agg_col=agg_col: _load_scorecard(agg_col, version)
+    rest['contractor_network'] = lambda: _load_contractor_network('ImplementingOffice', version)
+    if project_store.ENABLED:
+        rest['project_store'] = lambda: _load_project_store(version)
+    return first, rest
+
+@st.cache_resource(max_entries=1)
+def _warmup(version):
+    return warmup.Warmup().start(*_warmup_stages(version))
+
+def start_warmup():
+    """Starts warming every data cache in a background thread pool, once per data version, and returns its Warmup.
+
+    The filter bar, which every page renders first, calls it, so later loads find their cache
+    filled or wait for the load already in flight instead of starting another. Returns None
+    when the warm-up is disabled.
+    """
+    if not warmup.ENABLED:
+        return None
+    return _warmup(data_version())
+
+def rerun_when_warm(*names):
+    """Waits for the named warm-up tasks at the end of a run that skipped them, then reruns the page with them."""
+    state = start_warmup()
+    if state is not None and not state.ready(*names):
+        state.wait(*names)
+        st.rerun()
+
+@instrumented(st.cache_data)
+def get_geojson(detail='Medium'):
+    """Loads the bundled GeoJSON for PH regions and caches a simplified copy per detail level."""
+    tolerance, decimals = SIMPLIFY_LEVELS[detail]
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        # This new GeoJSON has a different structure, so we specify the feature key path
-        geojson_data = response.json()
-        # The key to identify regions is now 'properties.REGION'
-        return geojson_data, "properties.REGION" 
-    except requests.exceptions.RequestException as e:
-        st.error(f"Failed to fetch GeoJSON from URL: {e}")
+        geojson = read_geojson()
+    except (OSError, ValueError) as e:
+        st.error(f"Failed to load the regions GeoJSON: {e}")
         return None, None
+    return simplify_geojson(geojson, tolerance, decimals), f"properties.{FEATURE_PROPERTY}"
+
+def get_region_feature_keys():
+    """Maps each Region_std value to its GeoJSON feature key, or None when there is no match."""
+    return _get_region_feature_keys(data_version())
+
+@instrumented(st.cache_data(max_entries=1), name='get_region_feature_keys')
+def _get_region_feature_keys(version):
+    df = _load_project_data(version)
+    geojson, _ = get_geojson()
+    if df is None or geojson is None:
+        return {}
+    return match_regions(df['Region_std'].dropna().unique(), geojson)
+
+def plotly_chart(fig, **kwargs):
+    """Renders a Plotly figure, timing its serialization when diagnostics are enabled."""
+    title = fig.layout.title.text or 'figure'
+    with timed(f"plotly_chart: {title}"):
+        st.plotly_chart(fig, **kwargs)
+
+def _paginated(total, key, fetch, page_size, **kwargs):
+    pages = max(1, -(-total // page_size))
+    page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, key=key) if pages > 1 else 1
+    start, stop = (page - 1) * page_size, min(page * page_size, total)
+    st.dataframe(fetch(start, stop), **kwargs)
+    if pages > 1:
+        st.caption(f"Showing rows {start + 1:,}–{stop:,} of {total:,}")
+
+def paginated_dataframe(df, key, sort_by=None, ascending=True, page_size=TABLE_PAGE_SIZE, **kwargs):
+    """Shows one page of a table, sorted server-side, so only page_size rows are sent to the browser."""
+    def fetch(start, stop):
+        if sort_by is None:
+            return df.iloc[start:stop]
+        return sorted_window(df, sort_by, ascending, start, stop)
+    _paginated(len(df), key, fetch, page_size, **kwargs)
+
+def paginated_query(store, filters, columns, key, sort_by=None, ascending=True, page_size=TABLE_PAGE_SIZE, scope=None,
+                    **kwargs):
+    """Like paginated_dataframe, for the projects matching filters in the SQL store; only one page is read."""
+    def fetch(start, stop):
+        return project_store.query_projects(
+            store, filters, columns, sort_by=sort_by, ascending=ascending, limit=stop - start, offset=start, scope=scope
+        )
+    _paginated(project_store.count_projects(store, filters, scope=scope), key, fetch, page_size, hide_index=True, **kwargs)
+
+def search_select(label, options, key):
+    """A selectbox over at most MAX_SELECT_OPTIONS options, narrowed by a search box for long lists."""
+    query = st.text_input(f"Search ({len(options):,} available)", key=f"{key}_search") if len(options) > MAX_SELECT_OPTIONS else ''
+    matches = filter_options(options, query)
+    return st.selectbox(label, options=matches, key=key)
+
+def render_diagnostics():
+    """Logs this rerun's timing spans and shows them in a sidebar panel when diagnostics are enabled."""
+    spans = flush_run()
+    if not spans:
+        return
+    state = start_warmup()
+    if state is not None:
+        finished, total = state.progress()
+        with st.sidebar.expander(f"Warm-up ({finished}/{total} ready)"):
+            st.dataframe(state.status(), hide_index=True)
+    total = sum(span['seconds'] for span in spans if span['depth'] == 0)
+    with st.sidebar.expander(f"Diagnostics ({total:.2f}s)"):
+        st.dataframe(
+            [{'Step': '  ' * span['depth'] + span['name'], 'Seconds': span['seconds'], 'Cache': span['cache'],
+              'Rows': span['rows'], 'RSS Delta (MB)': span['rss_delta_mb']} for span in spans],
+            hide_index=True,
+        )
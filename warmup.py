@@ -0,0 +1,96 @@
+"""Background warm-up of the data caches, so the first page view does not wait on a serial chain of loads.
+
+On by default; set KILATIS_WARMUP=0 to load everything on demand instead. Tasks run in a
+pool of KILATIS_WARMUP_WORKERS threads (default 4), in stages: the loads every page waits
+on run first and on their own, then the rest. Most of the work is Parquet and CSV reads
+and pandas kernels that release the GIL, so loads overlap with each other and with page
+rendering.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ENABLED = os.environ.get('KILATIS_WARMUP', '1') not in ('', '0', 'false')
+WORKERS = int(os.environ.get('KILATIS_WARMUP_WORKERS', 4))
+
+PENDING, RUNNING, READY, FAILED = 'pending', 'running', 'ready', 'failed'
+
+
+class Warmup:
+    """Runs stages of named tasks in a thread pool and tracks the readiness of each task."""
+
+    def __init__(self, workers=WORKERS):
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix='warmup')
+        self._tasks = {}
+        self._done = {}
+        self._stages = []
+        self._remaining = self._stage_remaining = 0
+        self._lock = threading.Lock()
+
+    def start(self, *stages):
+        """Starts the stages of {name: callable} tasks, once, and returns self.
+
+        The tasks of a stage run in parallel once every task of the previous stage has finished,
+        so the loads a first page view waits on are not slowed down by the rest.
+        """
+        with self._lock:
+            self._stages = [dict(stage) for stage in stages if stage]
+            for stage in self._stages:
+                for name in stage:
+                    self._tasks[name] = {'task': name, 'state': PENDING, 'seconds': None, 'error': None}
+                    self._done[name] = threading.Event()
+            self._remaining = len(self._tasks)
+            self._submit_next_stage()
+        return self
+
+    def _submit_next_stage(self):
+        if not self._stages:
+            self._pool.shutdown(wait=False)
+            return
+        stage = self._stages.pop(0)
+        self._stage_remaining = len(stage)
+        for name, fn in stage.items():
+            self._pool.submit(self._run, name, fn)
+
+    def _run(self, name, fn):
+        task = self._tasks[name]
+        task['state'] = RUNNING
+        start = time.perf_counter()
+        try:
+            fn()
+            task['state'] = READY
+        except Exception as e:
+            # The page loading it on demand reports the error in context
+            task['state'], task['error'] = FAILED, repr(e)
+        task['seconds'] = round(time.perf_counter() - start, 3)
+        self._done[name].set()
+        with self._lock:
+            self._remaining -= 1
+            self._stage_remaining -= 1
+            if not self._stage_remaining:
+                self._submit_next_stage()
+
+    def ready(self, *names):
+        """True once all the named tasks have finished, successfully or not. Unknown names count as finished."""
+        return all(self._done[name].is_set() for name in names if name in self._done)
+
+    def wait(self, *names, timeout=None):
+        """Blocks until the named tasks (default: all) have finished. Returns whether they did within timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for name in names or list(self._done):
+            if name in self._done:
+                left = None if deadline is None else max(deadline - time.monotonic(), 0)
+                if not self._done[name].wait(left):
+                    return False
+        return True
+
+    def progress(self):
+        """(finished, total) number of tasks."""
+        with self._lock:
+            return len(self._tasks) - self._remaining, len(self._tasks)
+
+    def status(self):
+        """One dict per task: task, state, seconds and error."""
+        with self._lock:
+            return [dict(task) for task in self._tasks.values()]